@@ -0,0 +1,161 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db import transaction
+from django.utils import timezone
+
+from .models import MemberEngagement, User
+from attendance.archive import attendance_history
+from workouts.models import WorkoutTask
+
+WINDOW_DAYS = 28
+LOOKBACK_WEEKS = 52
+ENGAGEMENT_CHUNK_SIZE = 10000
+
+# Each risk component is scaled to 0..1 before weighting; the score is 0..100.
+RISK_WEIGHTS = {
+    "recency": 0.35,
+    "frequency": 0.25,
+    "trend": 0.15,
+    "streak": 0.10,
+    "tasks": 0.15,
+}
+HEALTHY_VISITS = 8
+RECENCY_CAP_DAYS = 30
+STREAK_CAP_WEEKS = 4
+
+
+def _chunks(queryset, size=ENGAGEMENT_CHUNK_SIZE):
+    chunk = []
+    for row in queryset.iterator(chunk_size=size):
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _positions(member_ids, values):
+    """Index of each of ``values`` in the sorted ``member_ids``, and which were found."""
+    idx = np.searchsorted(member_ids, values)
+    found = idx < len(member_ids)
+    found[found] = member_ids[idx[found]] == values[found]
+    return idx, found
+
+
+def compute_features(today=None):
+    """
+    Engagement features for every active member, as arrays aligned with ``member_ids``.
+
+    Visits from the last ``LOOKBACK_WEEKS`` weeks (hot and archived) and task
+    completions are streamed once in chunks; everything else is array math.
+    """
+    today = today or timezone.localdate()
+    members = np.array(
+        User.objects.filter(role=User.MEMBER, is_active=True, gym_branch__isnull=False)
+        .order_by("pk").values_list("pk", "gym_branch_id"),
+        dtype=np.int64,
+    ).reshape(-1, 2)
+    member_ids, n = members[:, 0], len(members)
+    lookback = LOOKBACK_WEEKS * 7
+    day_end = timezone.make_aware(datetime.combine(today + timedelta(days=1), time.min))
+
+    days_since = np.full(n, lookback, dtype=np.int64)
+    recent = np.zeros(n, dtype=np.int64)
+    previous = np.zeros(n, dtype=np.int64)
+    visited_weeks = np.zeros((n, LOOKBACK_WEEKS), dtype=bool)
+
+    visits = attendance_history(
+        ["member_id", "check_in"],
+        lambda qs: qs.filter(check_in__gte=day_end - timedelta(days=lookback), check_in__lt=day_end),
+    ).values_list("member_id", "check_in")
+    end = day_end.timestamp()
+    for chunk in _chunks(visits):
+        idx, found = _positions(member_ids, np.fromiter((m for m, _ in chunk), np.int64, len(chunk)))
+        ago = (end - np.fromiter((c.timestamp() for _, c in chunk), float, len(chunk))) // 86400
+        idx, ago = idx[found], np.minimum(ago[found], lookback - 1).astype(np.int64)
+        np.minimum.at(days_since, idx, ago)
+        recent += np.bincount(idx[ago < WINDOW_DAYS], minlength=n)
+        previous += np.bincount(idx[(ago >= WINDOW_DAYS) & (ago < 2 * WINDOW_DAYS)], minlength=n)
+        visited_weeks[idx, ago // 7] = True
+
+    completed = np.zeros(n, dtype=np.int64)
+    completions = WorkoutTask.objects.filter(
+        status="completed", updated_at__gte=day_end - timedelta(days=WINDOW_DAYS)
+    ).values_list("member_id", flat=True)
+    for chunk in _chunks(completions):
+        idx, found = _positions(member_ids, np.array(chunk, dtype=np.int64))
+        completed += np.bincount(idx[found], minlength=n)
+
+    overdue = np.zeros(n, dtype=np.int64)
+    late = WorkoutTask.objects.exclude(status="completed").filter(due_date__lt=today).values_list("member_id", flat=True)
+    for chunk in _chunks(late):
+        idx, found = _positions(member_ids, np.array(chunk, dtype=np.int64))
+        overdue += np.bincount(idx[found], minlength=n)
+
+    # Weeks in a row with a visit, ending last week; this week only extends it.
+    past = visited_weeks[:, 1:]
+    streak = np.where(past.all(axis=1), past.shape[1], past.argmin(axis=1)) + visited_weeks[:, 0]
+    trend = np.clip((recent - previous) / np.maximum(previous, 1), -1, 1)
+
+    return {
+        "member_ids": member_ids,
+        "gym_branch_ids": members[:, 1],
+        "days_since_visit": days_since,
+        "visited": days_since < lookback,
+        "recent_visits": recent,
+        "previous_visits": previous,
+        "streak_weeks": streak,
+        "trend": trend,
+        "completed_tasks": completed,
+        "overdue_tasks": overdue,
+    }
+
+
+def risk_scores(features):
+    components = {
+        "recency": np.minimum(features["days_since_visit"], RECENCY_CAP_DAYS) / RECENCY_CAP_DAYS,
+        "frequency": 1 - np.minimum(features["recent_visits"] / HEALTHY_VISITS, 1),
+        "trend": np.clip(-features["trend"], 0, 1),
+        "streak": 1 - np.minimum(features["streak_weeks"] / STREAK_CAP_WEEKS, 1),
+        "tasks": features["overdue_tasks"] / np.maximum(features["overdue_tasks"] + features["completed_tasks"], 1),
+    }
+    return np.round(100 * sum(RISK_WEIGHTS[name] * value for name, value in components.items()), 1)
+
+
+def score_members(today=None, batch_size=ENGAGEMENT_CHUNK_SIZE):
+    """Recompute every active member's ``MemberEngagement`` row; returns how many were written."""
+    features = compute_features(today)
+    scores = risk_scores(features)
+    computed_at = timezone.now()
+    rows = [
+        MemberEngagement(
+            member_id=int(member_id),
+            gym_branch_id=int(features["gym_branch_ids"][i]),
+            days_since_visit=int(features["days_since_visit"][i]) if features["visited"][i] else None,
+            recent_visits=int(features["recent_visits"][i]),
+            previous_visits=int(features["previous_visits"][i]),
+            streak_weeks=int(features["streak_weeks"][i]),
+            trend=round(float(features["trend"][i]), 3),
+            completed_tasks=int(features["completed_tasks"][i]),
+            overdue_tasks=int(features["overdue_tasks"][i]),
+            risk_score=float(scores[i]),
+            computed_at=computed_at,
+        )
+        for i, member_id in enumerate(features["member_ids"])
+    ]
+    with transaction.atomic():
+        MemberEngagement.objects.bulk_create(
+            rows,
+            batch_size=batch_size,
+            update_conflicts=True,
+            unique_fields=["member"],
+            update_fields=[
+                "gym_branch", "days_since_visit", "recent_visits", "previous_visits", "streak_weeks",
+                "trend", "completed_tasks", "overdue_tasks", "risk_score", "computed_at",
+            ],
+        )
+        # Members who left or were deactivated since the last run.
+        MemberEngagement.objects.filter(computed_at__lt=computed_at).delete()
+    return len(rows)
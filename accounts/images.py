@@ -0,0 +1,143 @@
+import hashlib
+import io
+import logging
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+
+from .authentication import user_cache
+from .models import User
+from gym_branches.public_cache import bump_directory_version
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZES = (64, 256)
+MAX_PICTURE_SIZE = getattr(settings, "PROFILE_PICTURE_MAX_SIZE", 1024)
+UPLOAD_DIR = "profile_pictures"
+THUMBNAIL_DIR = posixpath.join(UPLOAD_DIR, "thumbs")
+
+if features.check("webp"):
+    FORMAT, EXTENSION = "WEBP", "webp"
+else:
+    FORMAT, EXTENSION = "JPEG", "jpg"
+
+_executor = None
+
+
+def _storage():
+    return User._meta.get_field("profile_picture").storage
+
+
+def _encode(image):
+    if FORMAT == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    # Saving a fresh image drops EXIF/GPS and any other metadata of the upload.
+    if FORMAT == "WEBP":
+        image.save(buffer, FORMAT, quality=85, method=4)
+    else:
+        image.save(buffer, FORMAT, quality=85, optimize=True, progressive=True)
+    return buffer.getvalue()
+
+
+def _store(name, content):
+    storage = _storage()
+    if not storage.exists(name):
+        storage.save(name, ContentFile(content))
+    return name
+
+
+def render_variants(name):
+    """
+    Re-encode the upload at ``name`` and cut square thumbnails from it.
+
+    Returns ``(picture_name, {size: thumbnail_name})``; files are named after
+    the hash of the re-encoded picture, so identical uploads share them.
+    """
+    with _storage().open(name) as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+
+    picture = image.copy()
+    picture.thumbnail((MAX_PICTURE_SIZE, MAX_PICTURE_SIZE), Image.LANCZOS)
+    content = _encode(picture)
+    digest = hashlib.sha256(content).hexdigest()[:20]
+
+    picture_name = _store(posixpath.join(UPLOAD_DIR, f"{digest}.{EXTENSION}"), content)
+    thumbnails = {}
+    for size in THUMBNAIL_SIZES:
+        thumb = ImageOps.fit(image, (size, size), Image.LANCZOS)
+        thumbnails[str(size)] = _store(
+            posixpath.join(THUMBNAIL_DIR, f"{digest}_{size}.{EXTENSION}"), _encode(thumb)
+        )
+    return picture_name, thumbnails
+
+
+def delete_picture_files(name, thumbnails):
+    """Delete a picture and its thumbnails unless another user still points at it."""
+    if not name or User.objects.filter(profile_picture=name).exists():
+        return
+    storage = _storage()
+    for file_name in [name, *(thumbnails or {}).values()]:
+        storage.delete(file_name)
+
+
+def process_profile_picture(user_id, name):
+    close_old_connections()
+    try:
+        try:
+            picture_name, thumbnails = render_variants(name)
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError):
+            logger.warning("Could not process profile picture %s of user %s", name, user_id, exc_info=True)
+            return
+
+        # Only attach the variants if the user still has the same upload; a
+        # newer upload has its own job queued.
+        updated = User.objects.filter(pk=user_id, profile_picture=name).update(
+            profile_picture=picture_name, profile_thumbnails=thumbnails, updated_at=timezone.now()
+        )
+        if not updated:
+            delete_picture_files(picture_name, thumbnails)
+            return
+        if picture_name != name:
+            delete_picture_files(name, None)
+
+        # ``update()`` skips the User signals.
+        user_cache.evict(user_id)
+        bump_directory_version()
+    finally:
+        close_old_connections()
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "PROFILE_PICTURE_WORKERS", 2),
+            thread_name_prefix="profile-pictures",
+        )
+    return _executor
+
+
+def schedule_profile_picture(user):
+    """Process ``user``'s new upload in the background once the transaction commits."""
+    transaction.on_commit(
+        partial(_get_executor().submit, process_profile_picture, user.pk, user.profile_picture.name)
+    )
+
+
+def thumbnail_urls(user, request=None):
+    storage = _storage()
+    urls = {}
+    for size, name in (user.profile_thumbnails or {}).items():
+        url = storage.url(name)
+        urls[size] = request.build_absolute_uri(url) if request else url
+    return urls
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+
+ENDPOINTS = [
+    ("dashboard stats", "/api/v1/auth/dashboard/stats/", User.SUPER_ADMIN),
+    ("me", "/api/v1/auth/users/me/", User.MEMBER),
+    ("public trainers", "/api/v1/auth/public/trainers/", None),
+    ("public branches", "/api/v1/branches/public/", None),
+    ("attendance list", "/api/v1/attendance/", User.MANAGER),
+]
+
+
+async def _get(port, path, token):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    headers = f"GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nConnection: close\r\n"
+    if token:
+        headers += f"Authorization: Bearer {token}\r\n"
+    writer.write((headers + "\r\n").encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1])
+
+
+async def _load(port, path, token, total, concurrency):
+    latencies, failures = [], 0
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def client():
+        nonlocal failures
+        while not queue.empty():
+            queue.get_nowait()
+            started = time.perf_counter()
+            status = await _get(port, path, token)
+            latencies.append((time.perf_counter() - started) * 1000)
+            failures += status != 200
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, failures, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = "Compare the sync and async read endpoints side by side under uvicorn."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint.")
+        parser.add_argument("--concurrency", type=int, default=20)
+        parser.add_argument("--port", type=int, default=8765)
+
+    def handle(self, *args, requests, concurrency, port, **kwargs):
+        tokens = {None: None}
+        for role in {role for _, _, role in ENDPOINTS if role}:
+            user = User.objects.filter(role=role, is_active=True).first()
+            if user is None:
+                raise CommandError(f"No active {role} found; run `python manage.py seed` first.")
+            tokens[role] = str(RefreshToken.for_user(user).access_token)
+
+        results = {}
+        for mode in ("sync", "async"):
+            server = self.start_server(mode, port)
+            try:
+                for name, path, role in ENDPOINTS:
+                    asyncio.run(_load(port, path, tokens[role], concurrency, concurrency))  # warm up
+                    results[mode, name] = asyncio.run(_load(port, path, tokens[role], requests, concurrency))
+            finally:
+                server.terminate()
+                server.wait()
+
+        self.stdout.write(f"{requests} requests per endpoint, {concurrency} concurrent clients, 1 uvicorn worker")
+        self.stdout.write(f"{'endpoint':<16} {'mode':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'errors':>7}")
+        for name, _, _ in ENDPOINTS:
+            for mode in ("sync", "async"):
+                latencies, failures, elapsed = results[mode, name]
+                latencies.sort()
+                self.stdout.write(
+                    f"{name:<16} {mode:<6} {len(latencies) / elapsed:8.1f} "
+                    f"{statistics.median(latencies):8.2f} {latencies[int(len(latencies) * 0.95) - 1]:8.2f} {failures:7d}"
+                )
+
+    def start_server(self, mode, port):
+        env = {
+            **os.environ,
+            "ASYNC_READ_VIEWS": str(mode == "async"),
+            "DJANGO_DEBUG": "False",
+            "DJANGO_ALLOWED_HOSTS": "127.0.0.1",
+            "DJANGO_SETTINGS_MODULE": os.environ.get("DJANGO_SETTINGS_MODULE", "gym_management.settings"),
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "gym_management.asgi:application",
+             "--port", str(port), "--log-level", "warning", "--no-access-log"],
+            cwd=settings.BASE_DIR, env=env,
+        )
+        deadline = time.monotonic() + 20
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError("uvicorn exited; is it installed (pip install uvicorn)?")
+            try:
+                socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+                return server
+            except OSError:
+                time.sleep(0.1)
+        server.terminate()
+        raise CommandError(f"uvicorn did not start on port {port}.")
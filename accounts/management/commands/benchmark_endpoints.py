@@ -0,0 +1,239 @@
+import json
+import re
+import statistics
+import subprocess
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, setup_test_environment, teardown_test_environment
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import User
+from workouts.models import WorkoutPlan, WorkoutTask
+
+COLLECTION = Path(settings.BASE_DIR) / "postman" / "gym_management_system.postman_collection.json"
+
+FOLDER_ROLES = {
+    "Auth": User.SUPER_ADMIN,
+    "Super Admin": User.SUPER_ADMIN,
+    "Manager": User.MANAGER,
+    "Trainer": User.TRAINER,
+    "Member": User.MEMBER,
+}
+
+# The demo users from `seed`; the collection's own login bodies point at users
+# that only existed on the author's machine.
+LOGINS = {
+    User.SUPER_ADMIN: ("superadmin@gmail.com", "Admin@1234"),
+    User.MANAGER: ("manager_rakib@gmail.com", "Manager@1234"),
+    User.TRAINER: ("trainer_jabed@gmail.com", "Trainer@1234"),
+    User.MEMBER: ("member_nahin@gmail.com", "Member@1234"),
+}
+
+# The collection predates the /workouts/ prefix.
+PATH_ALIASES = {
+    "/api/v1/workout-plans/": "/api/v1/workouts/workout-plans/",
+    "/api/v1/workout-tasks/": "/api/v1/workouts/workout-tasks/",
+}
+
+
+def load_scenarios(path):
+    """Flatten the collection into ``(folder, name, method, path, body)`` tuples."""
+    collection = json.loads(Path(path).read_text())
+    scenarios = []
+    for folder in collection["item"]:
+        for item in folder["item"]:
+            request = item["request"]
+            url = request["url"]["raw"] if isinstance(request["url"], dict) else request["url"]
+            path = url.replace("{{base_url}}", "").strip()
+            for old, new in PATH_ALIASES.items():
+                if path.startswith(old):
+                    path = new + path[len(old):]
+            raw = (request.get("body") or {}).get("raw", "").strip()
+            scenarios.append((folder["name"], item["name"], request["method"], path, json.loads(raw) if raw else None))
+    return scenarios
+
+
+def percentile(sorted_values, pct):
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Command(BaseCommand):
+    help = (
+        "Replay the Postman collection against a throwaway database filled by `seed --scale` and "
+        "record latency, throughput and SQL query counts per endpoint and role as JSON."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--output", default="benchmark-results.json")
+        parser.add_argument("--compare", help="Earlier results file to print deltas against.")
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=3)
+        parser.add_argument("--scale", type=int, default=10, help="Passed to `seed --scale`.")
+        parser.add_argument("--members-per-branch", type=int, default=200)
+        parser.add_argument("--days", type=int, default=60)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--collection", default=str(COLLECTION))
+
+    def handle(self, *args, **options):
+        scenarios = load_scenarios(options["collection"])
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            call_command("seed", stdout=self.stdout)
+            call_command(
+                "seed", scale=options["scale"], members_per_branch=options["members_per_branch"],
+                days=options["days"], seed=options["seed"], stdout=self.stdout,
+            )
+            contexts = self.build_contexts()
+            results = [self.measure(scenario, contexts, options) for scenario in scenarios]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            "commit": self.git_commit(),
+            "dataset": {key: options[key] for key in ("scale", "members_per_branch", "days", "seed")},
+            "iterations": options["iterations"],
+            "results": results,
+        }
+        Path(options["output"]).write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+        previous = self.load_previous(options.get("compare"))
+        self.print_table(results, previous)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def build_contexts(self):
+        """Pick the users, ids and tokens each folder's requests act with."""
+        admin = User.objects.get(email=LOGINS[User.SUPER_ADMIN][0])
+        trainer = User.objects.filter(role=User.TRAINER, email__contains=".s").order_by("pk").first()
+        if trainer is None:
+            raise CommandError("seed --scale did not create any trainers.")
+        manager = User.objects.get(role=User.MANAGER, gym_branch_id=trainer.gym_branch_id, email__contains=".s")
+        member = User.objects.filter(role=User.MEMBER, trainer=trainer).order_by("pk").first()
+        plan = WorkoutPlan.objects.filter(created_by=trainer).order_by("pk").first()
+        # Branches are seeded with the 3-trainer maximum; free a slot so
+        # "create_trainer" measures the success path.
+        spare = User.objects.filter(role=User.TRAINER, gym_branch_id=manager.gym_branch_id).exclude(pk=trainer.pk).last()
+        spare.is_active = False
+        spare.save()
+
+        branch_ids = {
+            User.SUPER_ADMIN: User.objects.filter(role=User.MANAGER).exclude(pk=manager.pk).values_list("gym_branch_id", flat=True).first(),
+            User.MANAGER: manager.gym_branch_id,
+            User.TRAINER: trainer.gym_branch_id,
+            User.MEMBER: member.gym_branch_id,
+        }
+        users = {User.SUPER_ADMIN: admin, User.MANAGER: manager, User.TRAINER: trainer, User.MEMBER: member}
+        refresh = str(RefreshToken.for_user(admin))
+        task = WorkoutTask.objects.filter(member=member, workout_plan=plan).values_list("pk", flat=True).first()
+        return {
+            role: {
+                "token": str(RefreshToken.for_user(user).access_token),
+                "refresh": refresh,
+                "task": task,
+                # Body fields the collection hardcodes ids for.
+                "ids": {"gym_branch": branch_ids[role], "workout_plan": plan.pk, "member": member.pk, "trainer": trainer.pk},
+            }
+            for role, user in users.items()
+        }
+
+    def prepare(self, folder, name, method, path, body, contexts):
+        role = FOLDER_ROLES.get(folder, User.SUPER_ADMIN)
+        ctx = contexts[role]
+        headers = {}
+        if body and "password" in body and path.endswith("/login/"):
+            login_role = next(
+                (r for r, word in ((User.MANAGER, "manager"), (User.TRAINER, "trainer"), (User.MEMBER, "member"))
+                 if word in name.lower()),
+                User.SUPER_ADMIN,
+            )
+            body = dict(zip(("email", "password"), LOGINS[login_role]))
+        else:
+            headers["HTTP_AUTHORIZATION"] = f"Bearer {ctx['token']}"
+
+        if body:
+            body = {key: ctx["ids"].get(key, value) for key, value in body.items()}
+            if body.get("refresh") == "{{refresh_token}}":
+                body["refresh"] = ctx["refresh"]
+            if path.endswith("/auth/users/") and method == "POST":
+                body.setdefault("mobile_number", "01599999999")
+                if body.get("role") == User.MEMBER:
+                    body.setdefault("trainer", ctx["ids"]["trainer"])
+        path = re.sub(r"/workout-tasks/\d+/$", f"/workout-tasks/{ctx['task']}/", path)
+        return role, path, body, headers
+
+    def measure(self, scenario, contexts, options):
+        folder, name, method, path, body = scenario
+        role, path, body, headers = self.prepare(folder, name, method, path, body, contexts)
+        send = getattr(Client(), method.lower())
+        cache.clear()
+
+        timings, queries, status = [], [], None
+        for i in range(options["warmup"] + options["iterations"]):
+            # Every write is rolled back, so each iteration sees the same data.
+            with transaction.atomic():
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    if body is None:
+                        response = send(path, **headers)
+                    else:
+                        response = send(path, data=json.dumps(body), content_type="application/json", **headers)
+                    elapsed = time.perf_counter() - started
+                transaction.set_rollback(True)
+            if i >= options["warmup"]:
+                timings.append(elapsed * 1000)
+                queries.append(len(captured))
+            status = response.status_code
+
+        timings.sort()
+        return {
+            "folder": folder,
+            "name": name,
+            "role": role,
+            "method": method,
+            "path": path,
+            "status": status,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "rps": round(1000 / statistics.fmean(timings), 1),
+            "queries": max(queries),
+        }
+
+    def load_previous(self, path):
+        if not path:
+            return {}
+        data = json.loads(Path(path).read_text())
+        return {(r["folder"], r["name"]): r for r in data["results"]}
+
+    def print_table(self, results, previous):
+        self.stdout.write(
+            f"{'folder':<12} {'request':<28} {'status':>6} {'p50':>9} {'p95':>9} {'p99':>9} {'req/s':>8} {'queries':>8}"
+        )
+        for r in results:
+            line = (
+                f"{r['folder']:<12} {r['name'][:28]:<28} {r['status']:>6} {r['p50_ms']:>9.2f} "
+                f"{r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} {r['rps']:>8.1f} {r['queries']:>8}"
+            )
+            old = previous.get((r["folder"], r["name"]))
+            if old:
+                change = (r["p50_ms"] - old["p50_ms"]) / old["p50_ms"] * 100 if old["p50_ms"] else 0
+                line += f"  p50 {change:+.0f}%, queries {r['queries'] - old['queries']:+d}"
+            self.stdout.write(line)
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
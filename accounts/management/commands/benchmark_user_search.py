@@ -0,0 +1,74 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from accounts.models import User
+from accounts.search import fts_available, icontains_filter, rebuild_search_index, search_users
+from gym_branches.models import GymBranch
+
+FIRST_NAMES = ["Abdullah", "Nahin", "Rakib", "Jabed", "Alif", "Sadia", "Tanvir", "Nusrat", "Fahim", "Mim"]
+LAST_NAMES = ["Ahmed", "Hossain", "Rahman", "Islam", "Chowdhury", "Khan", "Akter", "Uddin"]
+
+
+class Command(BaseCommand):
+    help = "Benchmark ?search= on a throwaway test database filled with synthetic users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=500_000)
+        parser.add_argument("--queries", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, users, queries, seed, **kwargs):
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self.run(users, queries, random.Random(seed))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+    def run(self, users, queries, rng):
+        branch = GymBranch.objects.create(name="Benchmark Branch", location="Dhaka")
+        started = time.perf_counter()
+        batch = []
+        for i in range(users):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            batch.append(User(
+                email=f"{first.lower()}.{last.lower()}{i}@example.com",
+                full_name=f"{first} {last}",
+                username=f"{first.lower()}{i}",
+                mobile_number=f"017{i:08d}",
+                role=User.MEMBER,
+                gym_branch=branch,
+                password="!",
+            ))
+            if len(batch) == 5000:
+                User.objects.bulk_create(batch)
+                batch = []
+        User.objects.bulk_create(batch)
+        rebuild_search_index()
+        self.stdout.write(f"Loaded {users} users in {time.perf_counter() - started:.1f}s "
+                          f"(FTS index: {'yes' if fts_available() else 'no'})")
+
+        # Selective terms match one or two users; names match a tenth of them.
+        selective = [f"{rng.randrange(users):08d}"[-6:] for _ in range(queries // 2)]
+        selective += [f"{rng.choice(FIRST_NAMES).lower()}{rng.randrange(users)}" for _ in range(queries - len(selective))]
+        names = [rng.choice(FIRST_NAMES + LAST_NAMES).lower() for _ in range(queries)]
+
+        base = User.objects.filter(is_active=True)
+        for label, build in (
+            ("indexed", lambda term: search_users(base, term)),
+            ("icontains", lambda term: base.filter(icontains_filter(term)).order_by("-created_at")),
+        ):
+            for kind, terms in (("selective", selective), ("names", names)):
+                timings = []
+                for term in terms:
+                    t0 = time.perf_counter()
+                    list(build(term)[:10])
+                    timings.append((time.perf_counter() - t0) * 1000)
+                timings.sort()
+                self.stdout.write(
+                    f"{label:>10} {kind:>9}: p50={statistics.median(timings):.2f}ms "
+                    f"p95={timings[int(len(timings) * 0.95) - 1]:.2f}ms max={timings[-1]:.2f}ms"
+                )
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from accounts.images import process_profile_picture
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = "Re-encode profile pictures and build thumbnails for users that have none yet."
+
+    def handle(self, *args, **kwargs):
+        pending = (
+            User.objects.exclude(profile_picture="").exclude(profile_picture__isnull=True)
+            .filter(profile_thumbnails={})
+            .values_list("pk", "profile_picture")
+        )
+        processed = 0
+        for user_id, name in list(pending):
+            process_profile_picture(user_id, name)
+            processed += 1
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} profile picture(s)"))
@@ -0,0 +1,19 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from accounts.engagement import ENGAGEMENT_CHUNK_SIZE, score_members
+
+
+class Command(BaseCommand):
+    help = "Recompute engagement features and churn-risk scores for all active members. Meant to run nightly."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=ENGAGEMENT_CHUNK_SIZE)
+
+    def handle(self, *args, batch_size, **kwargs):
+        started = time.perf_counter()
+        written = score_members(batch_size=batch_size)
+        self.stdout.write(self.style.SUCCESS(
+            f"Scored {written} members in {time.perf_counter() - started:.1f}s"
+        ))
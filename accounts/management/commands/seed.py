@@ -1,11 +1,64 @@
-from django.core.management.base import BaseCommand
-from django.db import transaction
+import itertools
+import random
+import time as clock
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
 from accounts.models import User
+from accounts.search import rebuild_search_index
+from accounts.stats import invalidate_branch_stats
+from attendance.models import Attendance, DailyCheckIn
 from gym_branches.models import GymBranch
+from gym_branches.counters import get_counter, rebuild_branch_stats
+from gym_branches.public_cache import bump_directory_version
+from workouts.models import WorkoutPlan, WorkoutTask
+
+AREAS = ["Dhanmondi", "Gulshan", "Banani", "Uttara", "Mirpur", "Mohammadpur", "Bashundhara", "Motijheel"]
+FIRST_NAMES = ["Abdullah", "Nahin", "Rakib", "Jabed", "Alif", "Sadia", "Tanvir", "Nusrat", "Fahim", "Mim",
+               "Arif", "Farzana", "Imran", "Tania", "Sakib", "Riya", "Hasan", "Sumaiya", "Mahin", "Lamia"]
+LAST_NAMES = ["Ahmed", "Hossain", "Rahman", "Islam", "Chowdhury", "Khan", "Akter", "Uddin", "Sarker", "Karim"]
+PLAN_TITLES = ["Full Body Strength", "Fat Loss Circuit", "Beginner Mobility", "Push Pull Legs",
+               "Cardio Endurance", "Core Stability", "Powerlifting Basics", "HIIT Express"]
+# Preferred training hours and how many members pick them: early morning and after work dominate.
+HOURS = [6, 7, 8, 9, 12, 13, 17, 18, 19, 20, 21]
+HOUR_WEIGHTS = [8, 12, 9, 4, 3, 3, 10, 16, 15, 9, 4]
+TASK_STATUSES = ["pending", "in_progress", "completed"]
+TASK_STATUS_WEIGHTS = [2, 3, 5]
+SCALE_PASSWORD = "Synthetic@1234"
+SCALE_PHONE_PREFIX = "016"
+SCALE_PHONE_PATTERN = rf"^{SCALE_PHONE_PREFIX}[0-9]{{8}}$"
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
 
 class Command(BaseCommand):
+    help = "Create the demo users, or with --scale N a deterministic synthetic dataset of N branches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--scale", type=int, help="Generate this many synthetic branches.")
+        parser.add_argument("--members-per-branch", type=int, default=200)
+        parser.add_argument("--plans-per-trainer", type=int, default=4)
+        parser.add_argument("--tasks-per-member", type=int, default=3)
+        parser.add_argument("--days", type=int, default=90, help="Days of attendance history.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed; same seed, same data.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, scale=None, **options):
+        if scale:
+            self.seed_scale(scale, **options)
+        else:
+            self.seed_demo()
+
     @transaction.atomic
-    def handle(self, *args, **kwargs):
+    def seed_demo(self):
         branch, _ = GymBranch.objects.get_or_create(
             name="Dhanmondi Branch",
             defaults={"location": "Dhanmondi, Dhaka"},
@@ -36,7 +89,7 @@ class Command(BaseCommand):
         for email in trainer_emails:
             existing = User.objects.filter(email=email.lower()).first()
             if not existing:
-                count = User.objects.filter(gym_branch=branch, role=User.TRAINER, is_active=True).count()
+                count = get_counter(branch.id, "trainer_count")
                 if count >= 3:
                     self.stdout.write(self.style.WARNING(f"Skipped {email}: branch already has 3 trainers"))
                     continue
@@ -45,3 +98,182 @@ class Command(BaseCommand):
         upsert_user("member_nahin@gmail.com", "Member@1234", User.MEMBER, branch)
 
         self.stdout.write(self.style.SUCCESS("Seed completed"))
+
+    @staticmethod
+    def day_start(day):
+        return timezone.make_aware(datetime.combine(day, time.min))
+
+    @staticmethod
+    def with_trainer(member, rng, branch_trainers):
+        member.trainer = rng.choice(branch_trainers)
+        return member
+
+    def attendance(self, members, days, rng):
+        """
+        Yield ``days`` of visits per member, oldest first, as
+        ``(member_id, gym_branch_id, check_in, check_out)`` rows.
+
+        Every member keeps a weekly habit and a preferred hour; Fridays are
+        quieter. Times are naive in the connection's time zone, which is how
+        the backends store them, so no row pays for time zone conversion.
+        """
+        tz = connection.timezone
+        # SQLite stores datetimes as text, exactly str() of the naive value.
+        to_db = str if connection.vendor == "sqlite" else (lambda value: value)
+        now = timezone.make_naive(timezone.now(), tz)
+        starts = [
+            timezone.make_naive(self.day_start(timezone.localdate() - timedelta(days=offset)), tz)
+            for offset in range(days, -1, -1)
+        ]
+        chances = [0.6 if start.weekday() == 4 else 1.0 for start in starts]
+        minutes = [timedelta(minutes=m) for m in range(24 * 60 + 60)]
+        for member in members:
+            habit = rng.choice([1, 2, 3, 3, 4, 4, 5, 6]) / 7
+            minute_of_day = rng.choices(HOURS, HOUR_WEIGHTS)[0] * 60 - 45
+            for start, factor in zip(starts, chances):
+                if rng.random() >= habit * factor:
+                    continue
+                check_in = start + minutes[minute_of_day + int(rng.random() * 91)]
+                check_out = check_in + minutes[min(180, max(30, int(rng.gauss(75, 20))))]
+                if check_in > now:
+                    continue
+                # Still in the gym right now: leave the session open.
+                yield member.pk, member.gym_branch_id, to_db(check_in), to_db(check_out) if check_out <= now else None
+
+    def insert_attendance(self, rows, batch_size):
+        """
+        Insert attendance rows with ``executemany``.
+
+        At a million rows, building model instances for ``bulk_create`` costs
+        several times more than the insert itself.
+        """
+        opts = Attendance._meta
+        qn = connection.ops.quote_name
+        columns = [opts.get_field(name).column for name in ("member", "gym_branch", "check_in", "check_out")]
+        sql = f"INSERT INTO {qn(opts.db_table)} ({', '.join(map(qn, columns))}) VALUES (%s, %s, %s, %s)"
+        inserted = 0
+        with connection.cursor() as cursor:
+            for batch in batched(rows, batch_size):
+                cursor.executemany(sql, batch)
+                inserted += len(batch)
+        return inserted
+
+    def seed_scale(self, scale, members_per_branch, plans_per_trainer, tasks_per_member, days, seed,
+                   batch_size, **kwargs):
+        prefix = f"Synthetic {seed}"
+        if GymBranch.objects.filter(name__startswith=f"{prefix} ").exists():
+            raise CommandError(f"Synthetic data for seed {seed} already exists; pick another --seed.")
+
+        rng = random.Random(seed)
+        started = clock.perf_counter()
+        # Bulk inserts skip save() and its per-user hashing; every synthetic user shares one hash.
+        password = make_password(SCALE_PASSWORD)
+        # Numbers continue after the highest synthetic one, so runs with other seeds never collide.
+        last_phone = User.objects.filter(mobile_number__regex=SCALE_PHONE_PATTERN).aggregate(
+            last=Max("mobile_number")
+        )["last"]
+        phone_serials = itertools.count(int(last_phone[len(SCALE_PHONE_PREFIX):]) + 1 if last_phone else 1)
+
+        def person(index, role, branch):
+            first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            key = f"{role}{index}.s{seed}.b{branch_numbers[branch.pk]}"
+            return User(
+                email=f"{key}@example.com",
+                full_name=f"{first} {last}",
+                username=key,
+                mobile_number=f"{SCALE_PHONE_PREFIX}{next(phone_serials):08d}",
+                gender=rng.choice([User.GENDER_MALE, User.GENDER_FEMALE]),
+                age=rng.randint(17, 60),
+                role=role,
+                gym_branch=branch,
+                password=password,
+            )
+
+        with transaction.atomic():
+            branches = GymBranch.objects.bulk_create([
+                GymBranch(name=f"{prefix} {AREAS[i % len(AREAS)]} {i + 1}", location=f"{AREAS[i % len(AREAS)]}, Dhaka")
+                for i in range(scale)
+            ])
+            branch_numbers = {branch.pk: number for number, branch in enumerate(branches, 1)}
+            staff = User.objects.bulk_create(
+                [person(0, User.MANAGER, branch) for branch in branches]
+                + [person(i, User.TRAINER, branch) for branch in branches for i in range(3)],
+                batch_size=batch_size,
+            )
+            trainers = {}
+            for user in staff:
+                if user.role == User.TRAINER:
+                    trainers.setdefault(user.gym_branch_id, []).append(user)
+
+            members = []
+            for batch in batched(
+                (
+                    self.with_trainer(person(i, User.MEMBER, branch), rng, trainers[branch.pk])
+                    for branch in branches for i in range(members_per_branch)
+                ),
+                batch_size,
+            ):
+                members.extend(User.objects.bulk_create(batch))
+
+            plans = WorkoutPlan.objects.bulk_create(
+                [
+                    WorkoutPlan(
+                        title=rng.choice(PLAN_TITLES),
+                        description="Generated by seed --scale.",
+                        created_by=trainer,
+                        gym_branch_id=trainer.gym_branch_id,
+                    )
+                    for branch_trainers in trainers.values() for trainer in branch_trainers
+                    for _ in range(plans_per_trainer)
+                ],
+                batch_size=batch_size,
+            )
+            plans_by_trainer = {}
+            for plan in plans:
+                plans_by_trainer.setdefault(plan.created_by_id, []).append(plan)
+
+            today = timezone.localdate()
+            task_count = 0
+            for batch in batched(
+                (
+                    WorkoutTask(
+                        workout_plan=plan,
+                        member=member,
+                        gym_branch_id=member.gym_branch_id,
+                        status=rng.choices(TASK_STATUSES, TASK_STATUS_WEIGHTS)[0],
+                        due_date=today + timedelta(days=rng.randint(-days, 30)),
+                    )
+                    for member in members for _ in range(tasks_per_member)
+                    for plan in [rng.choice(plans_by_trainer[member.trainer_id])]
+                ),
+                batch_size,
+            ):
+                WorkoutTask.objects.bulk_create(batch)
+                task_count += len(batch)
+
+            attendance_count = self.insert_attendance(
+                self.attendance(members, days, rng), batch_size
+            )
+
+            DailyCheckIn.objects.bulk_create(
+                [
+                    DailyCheckIn(member_id=member_id, date=today, count=1)
+                    for member_id in Attendance.objects.filter(
+                        gym_branch__in=branches, check_in__gte=self.day_start(today)
+                    ).values_list("member_id", flat=True)
+                ],
+                batch_size=batch_size,
+            )
+
+            # bulk_create skips the signals that keep these in sync.
+            branch_ids = [branch.pk for branch in branches]
+            rebuild_branch_stats(branch_ids)
+            for branch_id in branch_ids:
+                invalidate_branch_stats(branch_id)
+            rebuild_search_index()
+            transaction.on_commit(bump_directory_version)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(branches)} branches, {len(staff) + len(members)} users, {len(plans)} plans, "
+            f"{task_count} tasks and {attendance_count} attendance rows in {clock.perf_counter() - started:.1f}s"
+        ))
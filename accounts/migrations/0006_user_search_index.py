@@ -0,0 +1,51 @@
+from django.db import migrations
+
+SEARCH_FIELDS = ("email", "full_name", "username", "mobile_number")
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    columns = ", ".join(SEARCH_FIELDS)
+
+    if connection.vendor == "sqlite":
+        sources = ", ".join(f"COALESCE({field}, '')" for field in SEARCH_FIELDS)
+        with connection.cursor() as cursor:
+            # The trigram tokenizer needs SQLite 3.34+; without it search
+            # falls back to icontains.
+            cursor.execute("SELECT sqlite_version()")
+            version = tuple(int(part) for part in cursor.fetchone()[0].split("."))
+        if version < (3, 34):
+            return
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE accounts_user_search USING fts5({columns}, tokenize='trigram')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO accounts_user_search (rowid, {columns}) SELECT id, {sources} FROM accounts_user"
+        )
+    elif connection.vendor == "postgresql":
+        schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(
+                f"CREATE INDEX IF NOT EXISTS accounts_user_{field}_trgm "
+                f"ON accounts_user USING gin (UPPER({field}::text) gin_trgm_ops)"
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "sqlite":
+        schema_editor.execute("DROP TABLE IF EXISTS accounts_user_search")
+    elif connection.vendor == "postgresql":
+        for field in SEARCH_FIELDS:
+            schema_editor.execute(f"DROP INDEX IF EXISTS accounts_user_{field}_trgm")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_user_mobile_number'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:56
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0007_user_profile_thumbnails'),
+        ('gym_branches', '0003_branchstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MemberEngagement',
+            fields=[
+                ('member', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='engagement', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('days_since_visit', models.PositiveSmallIntegerField(null=True)),
+                ('recent_visits', models.PositiveSmallIntegerField(default=0)),
+                ('previous_visits', models.PositiveSmallIntegerField(default=0)),
+                ('streak_weeks', models.PositiveSmallIntegerField(default=0)),
+                ('trend', models.FloatField(default=0)),
+                ('completed_tasks', models.PositiveIntegerField(default=0)),
+                ('overdue_tasks', models.PositiveIntegerField(default=0)),
+                ('risk_score', models.FloatField(default=0)),
+                ('computed_at', models.DateTimeField()),
+                ('gym_branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='member_engagement', to='gym_branches.gymbranch')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['gym_branch', '-risk_score', '-member'], name='engagement_branch_risk_idx'), models.Index(fields=['-risk_score', '-member'], name='engagement_risk_idx')],
+            },
+        ),
+    ]
@@ -42,6 +42,8 @@ class User(AbstractBaseUser, PermissionsMixin):
     gender = models.CharField(max_length=10, choices=GENDER_CHOICES, blank=True, null=True)
     age = models.PositiveIntegerField(blank=True, null=True)
     profile_picture = models.ImageField(upload_to="profile_pictures/", blank=True, null=True)
+    # {"64": name, "256": name}, filled in by accounts.images after upload.
+    profile_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     mobile_number = models.CharField(max_length=15, unique=True, null=True, blank=True)
     gym_branch = models.ForeignKey(
         "gym_branches.GymBranch",
@@ -78,4 +80,38 @@ class User(AbstractBaseUser, PermissionsMixin):
             raise ValidationError({"gym_branch": "Branch is required for this role."})
 
     def __str__(self):
-        return f"{self.email} ({self.get_role_display()})"
\ No newline at end of file
+        return f"{self.email} ({self.get_role_display()})"
+
+class MemberEngagement(models.Model):
+    """Nightly engagement features and churn-risk score for one member (see accounts.engagement)."""
+
+    member = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="engagement",
+    )
+    gym_branch = models.ForeignKey(
+        "gym_branches.GymBranch",
+        on_delete=models.CASCADE,
+        related_name="member_engagement",
+    )
+    # None when the member has no visit in the lookback window.
+    days_since_visit = models.PositiveSmallIntegerField(null=True)
+    recent_visits = models.PositiveSmallIntegerField(default=0)
+    previous_visits = models.PositiveSmallIntegerField(default=0)
+    streak_weeks = models.PositiveSmallIntegerField(default=0)
+    trend = models.FloatField(default=0)
+    completed_tasks = models.PositiveIntegerField(default=0)
+    overdue_tasks = models.PositiveIntegerField(default=0)
+    risk_score = models.FloatField(default=0)
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["gym_branch", "-risk_score", "-member"], name="engagement_branch_risk_idx"),
+            models.Index(fields=["-risk_score", "-member"], name="engagement_risk_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id}: {self.risk_score}"
@@ -0,0 +1,112 @@
+from django.db import connections
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+SEARCH_FIELDS = ("email", "full_name", "username", "mobile_number")
+SEARCH_TABLE = "accounts_user_search"
+MIN_INDEXED_LENGTH = 3
+RANKED_MATCH_LIMIT = 1000
+
+_fts_tables = {}
+
+
+def fts_available(using="default"):
+    if using not in _fts_tables:
+        connection = connections[using]
+        _fts_tables[using] = (
+            connection.vendor == "sqlite" and SEARCH_TABLE in connection.introspection.table_names()
+        )
+    return _fts_tables[using]
+
+
+def _fts_phrase(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def icontains_filter(term):
+    query = Q()
+    for field in SEARCH_FIELDS:
+        query |= Q(**{f"{field}__icontains": term})
+    return query
+
+
+def _fts_match_count(phrase, limit, using):
+    """How many users match ``phrase``, counting no further than ``limit + 1``."""
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f"SELECT COUNT(*) FROM (SELECT 1 FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s LIMIT %s)",
+            [phrase, limit + 1],
+        )
+        return cursor.fetchone()[0]
+
+
+def search_users(queryset, term):
+    """
+    Filter ``queryset`` to users whose email, name, username or mobile number
+    contains ``term``, best matches first.
+
+    SQLite answers from the FTS5 trigram table kept by ``index_user``;
+    PostgreSQL uses the pg_trgm GIN indexes from the search migration. Terms
+    shorter than a trigram fall back to a plain ``icontains`` scan.
+
+    On SQLite, terms matching more than ``RANKED_MATCH_LIMIT`` users (a bare
+    first name) come back newest account first instead: ranking every match
+    costs time in proportion to the number of matches, while walking the
+    index in rowid order stops after one page.
+    """
+    term = term.strip()
+    if not term:
+        return queryset
+    if len(term) < MIN_INDEXED_LENGTH:
+        return queryset.filter(icontains_filter(term))
+
+    if fts_available(queryset.db):
+        # Join the FTS table so MATCH runs once for the whole query. Only
+        # select rank when ordering by it: bm25 reads every match's statistics.
+        phrase = _fts_phrase(term)
+        table = queryset.model._meta.db_table
+        broad = _fts_match_count(phrase, RANKED_MATCH_LIMIT, queryset.db) > RANKED_MATCH_LIMIT
+        column, ordering = ("rowid", ["-search_order"]) if broad else ("rank", ["search_order", "-created_at"])
+        return queryset.extra(
+            select={"search_order": f"{SEARCH_TABLE}.{column}"},
+            tables=[SEARCH_TABLE],
+            where=[f"{SEARCH_TABLE} MATCH %s", f"{SEARCH_TABLE}.rowid = {table}.id"],
+            params=[phrase],
+        ).order_by(*ordering)
+
+    if connections[queryset.db].vendor == "postgresql":
+        from django.contrib.postgres.search import TrigramWordSimilarity
+
+        rank = Greatest(*(TrigramWordSimilarity(term, field) for field in SEARCH_FIELDS))
+        return queryset.filter(icontains_filter(term)).annotate(search_rank=rank).order_by("-search_rank", "-created_at")
+
+    return queryset.filter(icontains_filter(term))
+
+
+def index_user(user, using="default"):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [user.pk])
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, {', '.join(SEARCH_FIELDS)}) VALUES (%s, %s, %s, %s, %s)",
+            [user.pk, *(getattr(user, field) or "" for field in SEARCH_FIELDS)],
+        )
+
+
+def unindex_user(user_id, using="default"):
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE} WHERE rowid = %s", [user_id])
+
+
+def rebuild_search_index(using="default"):
+    """Refill the FTS table from accounts_user, e.g. after bulk inserts."""
+    if not fts_available(using):
+        return
+    columns = ", ".join(SEARCH_FIELDS)
+    sources = ", ".join(f"COALESCE({field}, '')" for field in SEARCH_FIELDS)
+    with connections[using].cursor() as cursor:
+        cursor.execute(f"DELETE FROM {SEARCH_TABLE}")
+        cursor.execute(f"INSERT INTO {SEARCH_TABLE} (rowid, {columns}) SELECT id, {sources} FROM accounts_user")
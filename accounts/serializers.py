@@ -1,18 +1,22 @@
 from django.contrib.auth import authenticate
+from django.db import transaction
 from rest_framework import serializers
-from .models import User
+from .images import delete_picture_files, schedule_profile_picture, thumbnail_urls
+from .models import MemberEngagement, User
 from gym_branches.models import GymBranch
+from gym_branches.counters import get_counter
 
 
 class UserReadSerializer(serializers.ModelSerializer):
     gym_branch_name = serializers.CharField(source="gym_branch.name", read_only=True)
     trainer_email = serializers.EmailField(source="trainer.email", read_only=True)
+    profile_picture_thumbnails = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         fields = [
             "id", "username", "email", "mobile_number", "gender", "age", "profile_picture",
-            "role", "gym_branch", "gym_branch_name", "trainer", "trainer_email",
+            "profile_picture_thumbnails", "role", "gym_branch", "gym_branch_name", "trainer", "trainer_email",
             "created_at"
         ]
         read_only_fields = [
@@ -20,6 +24,36 @@ class UserReadSerializer(serializers.ModelSerializer):
             "trainer_email", "created_at"
         ]
 
+    def get_profile_picture_thumbnails(self, obj):
+        return thumbnail_urls(obj, self.context.get("request"))
+
+class MemberEngagementSerializer(serializers.ModelSerializer):
+    member_email = serializers.EmailField(source="member.email", read_only=True)
+    member_full_name = serializers.CharField(source="member.full_name", read_only=True)
+
+    class Meta:
+        model = MemberEngagement
+        fields = [
+            "member", "member_email", "member_full_name", "gym_branch", "risk_score",
+            "days_since_visit", "recent_visits", "previous_visits", "streak_weeks", "trend",
+            "completed_tasks", "overdue_tasks", "computed_at",
+        ]
+        read_only_fields = fields
+
+class RosterMemberSerializer(serializers.ModelSerializer):
+    pending_tasks = serializers.IntegerField(read_only=True)
+    in_progress_tasks = serializers.IntegerField(read_only=True)
+    completed_tasks = serializers.IntegerField(read_only=True)
+    last_visit = serializers.DateTimeField(read_only=True)
+
+    class Meta:
+        model = User
+        fields = [
+            "id", "username", "email", "full_name", "mobile_number", "pending_tasks",
+            "in_progress_tasks", "completed_tasks", "last_visit", "created_at",
+        ]
+        read_only_fields = fields
+
 class UserUpdateSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=False, min_length=8)
     mobile_number = serializers.CharField(
@@ -69,13 +103,18 @@ class UserUpdateSerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         password = validated_data.pop("password", None)
         
+        old_picture, old_thumbnails = instance.profile_picture.name, instance.profile_thumbnails
         remove_picture = self.context["request"].data.get("remove_profile_picture") == "true"
         if remove_picture:
-            if instance.profile_picture:
-                instance.profile_picture.delete(save=False)
             instance.profile_picture = None
+        if remove_picture or "profile_picture" in validated_data:
+            instance.profile_thumbnails = {}
 
         instance = super().update(instance, validated_data)
+        if instance.profile_picture.name != old_picture:
+            transaction.on_commit(lambda: delete_picture_files(old_picture, old_thumbnails))
+            if instance.profile_picture:
+                schedule_profile_picture(instance)
         if password:
             instance.set_password(password)
             instance.save(update_fields=["password"])
@@ -128,11 +167,7 @@ class UserCreateSerializer(serializers.ModelSerializer):
             attrs["gym_branch"] = creator.gym_branch
 
             if role == User.TRAINER:
-                trainer_count = User.objects.filter(
-                    gym_branch=creator.gym_branch,
-                    role=User.TRAINER,
-                    is_active=True
-                ).count()
+                trainer_count = get_counter(creator.gym_branch_id, "trainer_count")
                 if trainer_count >= 3:
                     raise serializers.ValidationError(
                         {"role": "This branch already has 3 trainers."}
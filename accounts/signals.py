@@ -0,0 +1,99 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete
+from django.dispatch import receiver
+
+from .authentication import user_cache
+from .models import User
+from .search import SEARCH_FIELDS, index_user, unindex_user
+from .stats import invalidate_branch_stats, invalidate_user_stats
+from gym_branches.models import GymBranch
+from workouts.models import WorkoutPlan, WorkoutTask
+
+STATS_FIELDS = {"role", "is_active", "gym_branch", "gym_branch_id"}
+# Read by the post_delete receivers, when the row is already gone.
+DELETE_FIELDS = {User: ["role", "gym_branch"], WorkoutTask: ["member", "workout_plan"]}
+
+
+def load_deferred_delete_fields(sender, instance, **kwargs):
+    deferred = instance.get_deferred_fields()
+    missing = [name for name in DELETE_FIELDS[sender] if instance._meta.get_field(name).attname in deferred]
+    if missing:
+        instance.refresh_from_db(fields=missing)
+
+
+for model in DELETE_FIELDS:
+    pre_delete.connect(load_deferred_delete_fields, sender=model, dispatch_uid=f"stats-delete-fields-{model.__name__}")
+
+
+@receiver([post_save, post_delete], sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
+
+
+@receiver(post_save, sender=User)
+def reindex_user(sender, instance, update_fields=None, using="default", **kwargs):
+    if update_fields and not set(SEARCH_FIELDS).intersection(update_fields):
+        return
+    index_user(instance, using)
+
+
+@receiver(post_delete, sender=User)
+def unindex_deleted_user(sender, instance, using="default", **kwargs):
+    unindex_user(instance.pk, using)
+
+
+@receiver([post_save, post_delete], sender=GymBranch)
+def clear_cached_users(sender, instance, **kwargs):
+    # Cached users carry their branch; branch edits are rare, so drop them all.
+    user_cache.clear()
+
+
+@receiver(post_init, sender=User)
+def remember_user_branch(sender, instance, **kwargs):
+    # The branch whose manager dashboard counts this user, to clear after a move.
+    instance._stats_branch_id = instance.__dict__.get("gym_branch_id")
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields and not STATS_FIELDS.intersection(update_fields):
+        return
+    invalidate_branch_stats(instance.gym_branch_id)
+    old_branch_id = getattr(instance, "_stats_branch_id", None)
+    if old_branch_id != instance.gym_branch_id:
+        invalidate_branch_stats(old_branch_id)
+    instance._stats_branch_id = instance.gym_branch_id
+
+
+@receiver(post_delete, sender=User)
+def user_deleted(sender, instance, **kwargs):
+    invalidate_branch_stats(instance.gym_branch_id)
+    invalidate_user_stats(instance.role, instance.id)
+
+
+@receiver([post_save, post_delete], sender=WorkoutPlan)
+def workout_plan_changed(sender, instance, **kwargs):
+    invalidate_branch_stats(instance.gym_branch_id)
+    invalidate_user_stats(User.TRAINER, instance.created_by_id)
+
+
+def _plan_trainer_id(task, plan_id):
+    if plan_id == task.workout_plan_id and WorkoutTask.workout_plan.is_cached(task):
+        return task.workout_plan.created_by_id
+    return WorkoutPlan.objects.filter(pk=plan_id).values_list("created_by_id", flat=True).first()
+
+
+@receiver(post_init, sender=WorkoutTask)
+def remember_task_owners(sender, instance, **kwargs):
+    # The member and plan whose dashboards count this task, to clear after a reassignment.
+    instance._stats_owners = (instance.__dict__.get("member_id"), instance.__dict__.get("workout_plan_id"))
+
+
+@receiver([post_save, post_delete], sender=WorkoutTask)
+def workout_task_changed(sender, instance, **kwargs):
+    old_member_id, old_plan_id = getattr(instance, "_stats_owners", (None, None))
+    invalidate_user_stats(User.MEMBER, *{instance.member_id, old_member_id})
+    trainer_ids = {_plan_trainer_id(instance, instance.workout_plan_id)}
+    if old_plan_id is not None and old_plan_id != instance.workout_plan_id:
+        trainer_ids.add(_plan_trainer_id(instance, old_plan_id))
+    invalidate_user_stats(User.TRAINER, *trainer_ids)
+    instance._stats_owners = (instance.member_id, instance.workout_plan_id)
@@ -0,0 +1,123 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, F, Q, Sum
+
+from .models import User
+from gym_branches.models import BranchStats, GymBranch
+from gym_management.metrics import record_cache
+from workouts.models import WorkoutPlan, WorkoutTask
+
+CACHE_PREFIX = "dashboard-stats"
+CACHE_TIMEOUT = getattr(settings, "DASHBOARD_STATS_CACHE_TIMEOUT", 300)
+
+
+def stats_cache_key(role, scope_id=None):
+    if scope_id is None:
+        return f"{CACHE_PREFIX}:{role}"
+    return f"{CACHE_PREFIX}:{role}:{scope_id}"
+
+
+def _task_status_counts(prefix=""):
+    return {
+        f"{status}_tasks": Count(f"{prefix}id", filter=Q(**{f"{prefix}status": status}))
+        for status, _ in WorkoutTask.STATUS_CHOICES
+    }
+
+
+def compute_super_admin_stats():
+    # Count GymBranch rows, so a branch without a counter row still shows up.
+    return GymBranch.objects.aggregate(
+        total_branches=Count("pk"),
+        total_managers=Sum("stats__manager_count", default=0),
+        total_trainers=Sum("stats__trainer_count", default=0),
+        total_members=Sum("stats__member_count", default=0),
+    )
+
+
+def compute_manager_stats(branch_id):
+    row = (
+        BranchStats.objects.filter(pk=branch_id)
+        .values(
+            total_trainers=F("trainer_count"),
+            total_members=F("member_count"),
+            total_workout_plans=F("plan_count"),
+        )
+        .first()
+    )
+    return row or {"total_trainers": 0, "total_members": 0, "total_workout_plans": 0}
+
+
+def compute_trainer_stats(trainer_id):
+    return WorkoutPlan.objects.filter(created_by_id=trainer_id).aggregate(
+        total_workout_plans=Count("id", distinct=True),
+        total_tasks=Count("tasks"),
+        **_task_status_counts("tasks__"),
+    )
+
+
+def compute_member_stats(member_id):
+    return WorkoutTask.objects.filter(member_id=member_id).aggregate(
+        total_tasks=Count("id"),
+        **_task_status_counts(),
+    )
+
+
+_COMPUTE = {
+    User.SUPER_ADMIN: lambda scope_id: compute_super_admin_stats(),
+    User.MANAGER: compute_manager_stats,
+    User.TRAINER: compute_trainer_stats,
+    User.MEMBER: compute_member_stats,
+}
+
+
+def _scope_id(user):
+    if user.role == User.SUPER_ADMIN:
+        return None
+    if user.role == User.MANAGER:
+        return user.gym_branch_id
+    return user.id
+
+
+def get_dashboard_stats(user):
+    compute = _COMPUTE.get(user.role)
+    if compute is None:
+        return None
+
+    scope_id = _scope_id(user)
+    key = stats_cache_key(user.role, scope_id)
+    stats = cache.get(key)
+    record_cache("dashboard_stats", stats is not None)
+    if stats is None:
+        stats = compute(scope_id)
+        cache.set(key, stats, CACHE_TIMEOUT)
+    return stats
+
+
+async def aget_dashboard_stats(user):
+    compute = _COMPUTE.get(user.role)
+    if compute is None:
+        return None
+
+    scope_id = _scope_id(user)
+    key = stats_cache_key(user.role, scope_id)
+    stats = await cache.aget(key)
+    record_cache("dashboard_stats", stats is not None)
+    if stats is None:
+        # Each role's stats are a single aggregate, so there is nothing to overlap.
+        stats = await sync_to_async(compute)(scope_id)
+        await cache.aset(key, stats, CACHE_TIMEOUT)
+    return stats
+
+
+def invalidate_branch_stats(branch_id):
+    keys = [stats_cache_key(User.SUPER_ADMIN)]
+    if branch_id is not None:
+        keys.append(stats_cache_key(User.MANAGER, branch_id))
+    cache.delete_many(keys)
+
+
+def invalidate_user_stats(role, *user_ids):
+    keys = [stats_cache_key(role, user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
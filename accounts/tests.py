@@ -1,3 +1,352 @@
+from datetime import datetime, time, timedelta
+from io import StringIO
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
 from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from attendance.models import Attendance
+from gym_branches.models import BranchStats, GymBranch
+from workouts.models import WorkoutPlan, WorkoutTask
+from .authentication import user_cache
+from .engagement import score_members
+from .models import MemberEngagement, User
+from .stats import get_dashboard_stats
+
+
+class TrainerRosterTests(TestCase):
+    url = "/api/v1/auth/users/roster/"
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch
+        )
+        self.plan = WorkoutPlan.objects.create(title="Plan", created_by=self.trainer, gym_branch=self.branch)
+        self.client = APIClient()
+        self.client.force_authenticate(self.trainer)
+
+    def add_members(self, count):
+        for _ in range(count):
+            n = User.objects.count()
+            member = User.objects.create_user(
+                f"member{n}@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=self.trainer
+            )
+            for status in ("pending", "pending", "in_progress", "completed"):
+                WorkoutTask.objects.create(workout_plan=self.plan, member=member, status=status)
+            Attendance.objects.create(member=member, gym_branch=self.branch, check_out=timezone.now())
+
+    def fetch(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response.data["results"]
+
+    def test_roster_counts_tasks_in_constant_queries(self):
+        self.add_members(2)
+        with self.assertNumQueries(2):
+            small = self.fetch()
+        self.add_members(8)
+        with self.assertNumQueries(2):
+            large = self.fetch()
+
+        self.assertEqual(len(small), 2)
+        self.assertEqual(len(large), 10)
+        row = large[0]
+        self.assertEqual(
+            (row["pending_tasks"], row["in_progress_tasks"], row["completed_tasks"]), (2, 1, 1)
+        )
+        self.assertIsNotNone(row["last_visit"])
+
+    def test_member_cannot_view_roster(self):
+        self.add_members(1)
+        self.client.force_authenticate(User.objects.get(role=User.MEMBER))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+
+class AtRiskTests(TestCase):
+    url = "/api/v1/auth/users/at-risk/"
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.other_branch = GymBranch.objects.create(name="Other Branch", location="Dhaka")
+        trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch
+        )
+        other_trainer = User.objects.create_user(
+            "trainer2@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.other_branch
+        )
+        self.regular = self.member("regular@test.com", trainer)
+        self.lapsed = self.member("lapsed@test.com", trainer)
+        self.outsider = self.member("outsider@test.com", other_trainer)
+        self.today = timezone.localdate()
+        # Every third day for eight weeks: 9 visits in the last 28 days, 10 in the 28 before.
+        for days_ago in range(1, 56, 3):
+            self.visit(self.regular, days_ago)
+        for days_ago in (40, 45, 50):
+            self.visit(self.lapsed, days_ago)
+
+        plan = WorkoutPlan.objects.create(title="Plan", created_by=trainer, gym_branch=self.branch)
+        WorkoutTask.objects.create(workout_plan=plan, member=self.regular, status="completed")
+        WorkoutTask.objects.create(workout_plan=plan, member=self.lapsed, due_date=self.today - timedelta(days=3))
+
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser("admin@test.com", "Admin@1234"))
+
+    def member(self, email, trainer):
+        return User.objects.create_user(
+            email, "Member@1234", role=User.MEMBER, gym_branch=trainer.gym_branch, trainer=trainer
+        )
+
+    def visit(self, member, days_ago):
+        check_in = timezone.make_aware(datetime.combine(self.today - timedelta(days=days_ago), time(10)))
+        session = Attendance.objects.create(member=member, gym_branch=member.gym_branch)
+        Attendance.objects.filter(pk=session.pk).update(check_in=check_in, check_out=check_in + timedelta(hours=1))
+
+    def test_features_and_scores(self):
+        self.assertEqual(score_members(self.today), 3)
+
+        regular = MemberEngagement.objects.get(member=self.regular)
+        self.assertEqual(
+            (regular.days_since_visit, regular.recent_visits, regular.previous_visits, regular.streak_weeks),
+            (1, 9, 10, 8),
+        )
+        self.assertAlmostEqual(regular.trend, -0.1)
+        self.assertEqual((regular.completed_tasks, regular.overdue_tasks), (1, 0))
+
+        lapsed = MemberEngagement.objects.get(member=self.lapsed)
+        self.assertEqual(
+            (lapsed.days_since_visit, lapsed.recent_visits, lapsed.previous_visits, lapsed.streak_weeks),
+            (40, 0, 3, 0),
+        )
+        self.assertEqual((lapsed.trend, lapsed.overdue_tasks), (-1, 1))
+        self.assertEqual(lapsed.risk_score, 100)
+
+        outsider = MemberEngagement.objects.get(member=self.outsider)
+        self.assertIsNone(outsider.days_since_visit)
+        self.assertLess(regular.risk_score, outsider.risk_score)
+
+    def test_rescoring_drops_deactivated_members(self):
+        score_members(self.today)
+        self.lapsed.is_active = False
+        self.lapsed.save()
+
+        self.assertEqual(score_members(self.today), 2)
+        self.assertFalse(MemberEngagement.objects.filter(member=self.lapsed).exists())
+
+    def test_lists_members_by_risk_within_the_callers_branch(self):
+        score_members(self.today)
+
+        response = self.client.get(self.url, {"branch": self.branch.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [row["member_email"] for row in response.data["results"]], ["lapsed@test.com", "regular@test.com"]
+        )
+
+        self.client.force_authenticate(User.objects.create_user(
+            "manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=self.other_branch
+        ))
+        response = self.client.get(self.url, {"branch": self.branch.pk})
+        self.assertEqual([row["member_email"] for row in response.data["results"]], ["outsider@test.com"])
+
+    def test_invalid_branch_is_a_bad_request(self):
+        self.assertEqual(self.client.get(self.url, {"branch": "abc"}).status_code, 400)
+
+
+class DashboardInvalidationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.other_branch = GymBranch.objects.create(name="Other Branch", location="Dhaka")
+        self.manager = User.objects.create_user(
+            "manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=self.branch
+        )
+        self.trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch
+        )
+        self.members = [
+            User.objects.create_user(
+                f"member{i}@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=self.trainer
+            )
+            for i in range(2)
+        ]
+
+    def test_moving_a_user_refreshes_the_old_branch_dashboard(self):
+        self.assertEqual(get_dashboard_stats(self.manager)["total_members"], 2)
+
+        member = User.objects.get(pk=self.members[0].pk)
+        member.gym_branch = self.other_branch
+        member.save()
+
+        self.assertEqual(get_dashboard_stats(self.manager)["total_members"], 1)
+
+    def test_admin_dashboard_counts_branches_without_a_counter_row(self):
+        admin = User.objects.create_superuser("admin@test.com", "Admin@1234")
+        BranchStats.objects.filter(pk=self.other_branch.pk).delete()
+        stats = get_dashboard_stats(admin)
+        self.assertEqual(stats["total_branches"], 2)
+        self.assertEqual((stats["total_managers"], stats["total_trainers"], stats["total_members"]), (1, 1, 2))
+
+    def test_reassigning_a_task_refreshes_the_old_member_dashboard(self):
+        plan = WorkoutPlan.objects.create(title="Plan", created_by=self.trainer, gym_branch=self.branch)
+        task = WorkoutTask.objects.create(workout_plan=plan, member=self.members[0])
+        self.assertEqual(get_dashboard_stats(self.members[0])["total_tasks"], 1)
+
+        task = WorkoutTask.objects.get(pk=task.pk)
+        task.member = self.members[1]
+        task.save()
+
+        self.assertEqual(get_dashboard_stats(self.members[0])["total_tasks"], 0)
+        self.assertEqual(get_dashboard_stats(self.members[1])["total_tasks"], 1)
+
+    def test_deleting_a_deferred_task_refreshes_its_member_dashboard(self):
+        plan = WorkoutPlan.objects.create(title="Plan", created_by=self.trainer, gym_branch=self.branch)
+        task = WorkoutTask.objects.create(workout_plan=plan, member=self.members[0])
+        self.assertEqual(get_dashboard_stats(self.members[0])["total_tasks"], 1)
+
+        WorkoutTask.objects.only("id").get(pk=task.pk).delete()
+
+        self.assertEqual(get_dashboard_stats(self.members[0])["total_tasks"], 0)
+
+
+class SeedScaleTests(TestCase):
+    def test_runs_with_seeds_sharing_the_last_digits_can_share_a_database(self):
+        for seed in (42, 142):
+            call_command("seed", scale=1, seed=seed, members_per_branch=5, days=1, stdout=StringIO())
+        self.assertEqual(User.objects.filter(email__contains=".s142.").count(), 9)
+
+
+class ProfileThumbnailUrlTests(TestCase):
+    def setUp(self):
+        branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.user = User.objects.create_user("manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=branch)
+        User.objects.filter(pk=self.user.pk).update(profile_thumbnails={"64": "profile_pictures/thumbs/64.webp"})
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.get(pk=self.user.pk))
+
+    def assertAbsolute(self, response):
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["profile_picture_thumbnails"]["64"].startswith("http://testserver/"))
+
+    def test_me_and_update_return_absolute_urls(self):
+        self.assertAbsolute(self.client.get("/api/v1/auth/users/me/"))
+        self.assertAbsolute(self.client.patch(f"/api/v1/auth/users/{self.user.pk}/", {"full_name": "Renamed"}))
+
+    def test_login_returns_absolute_urls(self):
+        response = APIClient().post("/api/v1/auth/login/", {"email": "manager@test.com", "password": "Manager@1234"})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data["user"]["profile_picture_thumbnails"]["64"].startswith("http://testserver/"))
+
+
+class UserSearchTests(TestCase):
+    url = "/api/v1/auth/users/"
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch, full_name="Rakib Hossain"
+        )
+        self.member = User.objects.create_user(
+            "nahin@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=self.trainer,
+            full_name="Nahin Ahmed", mobile_number="01712345678",
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser("admin@test.com", "Admin@1234"))
+
+    def search(self, term):
+        response = self.client.get(self.url, {"search": term})
+        self.assertEqual(response.status_code, 200)
+        return {row["email"] for row in response.data["results"]}
+
+    def test_matches_substrings_of_every_search_field(self):
+        self.assertEqual(self.search("HOSSAIN"), {"trainer@test.com"})
+        self.assertEqual(self.search("2345"), {"nahin@test.com"})
+        self.assertEqual(self.search("nahin@"), {"nahin@test.com"})
+        self.assertEqual(self.search("ak"), {"trainer@test.com"})
+
+    def test_broad_terms_list_the_newest_matches_first(self):
+        newer = User.objects.create_user(
+            "rakib@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=self.trainer,
+            full_name="Rakib Ahmed Chowdhury Hossain Rahman",
+        )
+        with mock.patch("accounts.search.RANKED_MATCH_LIMIT", 1):
+            response = self.client.get(self.url, {"search": "ahmed"})
+        self.assertEqual(
+            [row["email"] for row in response.data["results"]], [newer.email, "nahin@test.com"]
+        )
+
+    def test_export_accepts_a_search(self):
+        response = self.client.get(f"{self.url}export/", {"search": "nahin", "as": "ndjson"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"nahin@test.com", b"".join(response.streaming_content))
+
+    def test_index_follows_renames_and_deletes(self):
+        member = User.objects.get(pk=self.member.pk)
+        member.full_name = "Sadia Islam"
+        member.save()
+        self.assertEqual(self.search("Ahmed"), set())
+        self.assertEqual(self.search("sadia"), {"nahin@test.com"})
+
+        member.delete()
+        self.assertEqual(self.search("sadia"), set())
+
+
+class CachedAuthenticationTests(TestCase):
+    url = "/api/v1/auth/users/me/"
+
+    def setUp(self):
+        user_cache.clear()
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.user = User.objects.create_user(
+            "manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=self.branch
+        )
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}")
+
+    def test_repeat_requests_skip_the_user_lookup(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_deactivation_revokes_access_immediately(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deleted_user_is_not_served_from_the_cache(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        User.objects.get(pk=self.user.pk).delete()
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_branch_edits_reach_cached_users(self):
+        self.assertEqual(self.client.get(self.url).data["gym_branch_name"], "Test Branch")
+        self.branch.name = "Renamed Branch"
+        self.branch.save()
+        self.assertEqual(self.client.get(self.url).data["gym_branch_name"], "Renamed Branch")
+
+
+class TrainerCapTests(TestCase):
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.manager = User.objects.create_user(
+            "manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=self.branch
+        )
+        for i in range(3):
+            User.objects.create_user(f"trainer{i}@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch)
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
 
-# Create your tests here.
+    def test_cap_holds_for_a_branch_without_a_counter_row(self):
+        BranchStats.objects.filter(pk=self.branch.pk).delete()
+        response = self.client.post("/api/v1/auth/users/", {
+            "email": "trainer3@test.com", "password": "Trainer@1234", "role": User.TRAINER,
+            "mobile_number": "01700000003",
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("role", response.data)
+        self.assertEqual(User.objects.filter(role=User.TRAINER).count(), 3)
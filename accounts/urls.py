@@ -1,7 +1,11 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import LoginView, UserViewSet, DashboardStatsView, PublicTrainersByBranchView  
+from .views import (
+    LoginView, UserViewSet, DashboardStatsView, PublicTrainersByBranchView,
+    AsyncDashboardStatsView, AsyncMeView, AsyncPublicTrainersByBranchView,
+)
 
 router = DefaultRouter()
 router.register(r"users", UserViewSet, basename="user")
@@ -14,4 +18,11 @@ urlpatterns = [
     path("dashboard/stats/", DashboardStatsView.as_view(), name="dashboard-stats"),
     path("public/trainers/", PublicTrainersByBranchView.as_view(), name="public-trainers"),    
     path("", include(router.urls)),
-]
\ No newline at end of file
+]
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path("dashboard/stats/", AsyncDashboardStatsView.as_view(), name="dashboard-stats-async"),
+        path("public/trainers/", AsyncPublicTrainersByBranchView.as_view(), name="public-trainers-async"),
+        path("users/me/", AsyncMeView.as_view(), name="user-me-async"),
+    ] + urlpatterns
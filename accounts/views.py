@@ -1,56 +1,88 @@
+from collections import defaultdict
+
 from rest_framework import viewsets, mixins, status, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from .models import User
-from .serializers import UserReadSerializer, UserCreateSerializer, UserUpdateSerializer, LoginSerializer
+from .models import MemberEngagement, User
+from .serializers import (
+    MemberEngagementSerializer, RosterMemberSerializer, UserReadSerializer, UserCreateSerializer, UserUpdateSerializer, LoginSerializer,
+)
 from accounts.permissions import role_required
+from .stats import aget_dashboard_stats, get_dashboard_stats
+from .search import search_users
+from .images import thumbnail_urls
+from gym_management.async_views import AsyncAPIView, alist
+from gym_management.conditional import ConditionalGetMixin
+from gym_management.export import filter_date_range, parse_branch, stream_export
+from gym_management.pagination import KeysetPagination
 from gym_branches.models import GymBranch
-from workouts.models import WorkoutPlan, WorkoutTask
+from gym_branches.public_cache import acached_public_response, cached_public_response
+from attendance.models import Attendance, AttendanceArchive
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
-from django.db.models import Q
+from django.db.models import Count, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
 from django.db import models
 
+USER_EXPORT_FIELDS = [
+    "id", "email", "full_name", "username", "mobile_number", "role", "gym_branch_id",
+    "gym_branch__name", "trainer_id", "created_at",
+]
+
+def _last_check_in(model):
+    return Subquery(model.objects.filter(member=OuterRef("pk")).order_by("-check_in").values("check_in")[:1])
+
+
+def trainer_roster(trainer_id):
+    """A trainer's active members with task counts by status and last visit, as one query."""
+    task_counts = {
+        f"{status}_tasks": Count("workout_tasks", filter=Q(workout_tasks__status=status))
+        for status in ("pending", "in_progress", "completed")
+    }
+    return (
+        User.objects.filter(trainer_id=trainer_id, role=User.MEMBER, is_active=True)
+        .order_by("-created_at")
+        .annotate(
+            **task_counts,
+            # Archived sessions are all older than the hot table's.
+            last_visit=Coalesce(_last_check_in(Attendance), _last_check_in(AttendanceArchive)),
+        )
+    )
+
+
 class DashboardStatsView(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get(self, request):
-        user = request.user
+        stats = get_dashboard_stats(request.user)
+        if stats is None:
+            return Response({}, status=status.HTTP_403_FORBIDDEN)
+        return Response(stats)
 
-        if user.role == User.SUPER_ADMIN:
-            return Response({
-                "total_branches": GymBranch.objects.count(),
-                "total_managers": User.objects.filter(role=User.MANAGER, is_active=True).count(),
-                "total_trainers": User.objects.filter(role=User.TRAINER, is_active=True).count(),
-                "total_members": User.objects.filter(role=User.MEMBER, is_active=True).count(),
-            })
-
-        if user.role == User.MANAGER:
-            return Response({
-                "total_trainers": User.objects.filter(role=User.TRAINER, gym_branch=user.gym_branch, is_active=True).count(),
-                "total_members": User.objects.filter(role=User.MEMBER, gym_branch=user.gym_branch, is_active=True).count(),
-                "total_workout_plans": WorkoutPlan.objects.filter(gym_branch=user.gym_branch).count(),
-            })
+class AsyncDashboardStatsView(AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
 
-        if user.role == User.TRAINER:
-            tasks = WorkoutTask.objects.filter(workout_plan__created_by=user)
-            return Response({
-                "total_workout_plans": WorkoutPlan.objects.filter(created_by=user).count(),
-                "total_tasks": tasks.count(),
-                "pending_tasks": tasks.filter(status="pending").count(),
-                "in_progress_tasks": tasks.filter(status="in_progress").count(),
-                "completed_tasks": tasks.filter(status="completed").count(),
-            })
-
-        if user.role == User.MEMBER:
-            tasks = WorkoutTask.objects.filter(member=user)
-            return Response({
-                "total_tasks": tasks.count(),
-                "pending_tasks": tasks.filter(status="pending").count(),
-                "in_progress_tasks": tasks.filter(status="in_progress").count(),
-                "completed_tasks": tasks.filter(status="completed").count(),
-            })
+    async def get(self, request):
+        stats = await aget_dashboard_stats(request.user)
+        if stats is None:
+            return Response({}, status=status.HTTP_403_FORBIDDEN)
+        return Response(stats)
+
+
+class AsyncMeView(AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    async def get(self, request):
+        user = request.user
+        missing = [
+            field for field in ("gym_branch", "trainer")
+            if getattr(user, f"{field}_id") and not getattr(User, field).is_cached(user)
+        ]
+        for field in missing:
+            model = User._meta.get_field(field).related_model
+            setattr(user, field, await model.objects.aget(pk=getattr(user, f"{field}_id")))
+        return Response(UserReadSerializer(user, context={"request": request}).data, status=status.HTTP_200_OK)
 
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -66,7 +98,7 @@ class LoginView(APIView):
             {
                 "access": str(refresh.access_token),
                 "refresh": str(refresh),
-                "user": UserReadSerializer(user).data,
+                "user": UserReadSerializer(user, context={"request": request}).data,
             },
             status=status.HTTP_200_OK,
         )
@@ -75,6 +107,9 @@ class PublicTrainersByBranchView(APIView):
     permission_classes = [permissions.AllowAny]
 
     def get(self, request):
+        return cached_public_response(request, "trainers", lambda: self.build(request))
+
+    def build(self, request):
         branches = GymBranch.objects.prefetch_related(
             models.Prefetch(
                 "users",
@@ -83,6 +118,10 @@ class PublicTrainersByBranchView(APIView):
             )
         )
 
+        return self.serialize(request, branches)
+
+    @staticmethod
+    def serialize(request, branches):
         data = [
             {
                 "branch_id": branch.id,
@@ -93,6 +132,7 @@ class PublicTrainersByBranchView(APIView):
                         "full_name": t.username or t.email,
                         "email": t.email,
                         "profile_picture": request.build_absolute_uri(t.profile_picture.url) if t.profile_picture else None,
+                        "profile_picture_thumbnails": thumbnail_urls(t, request),
                     }
                     for t in branch.trainers
                 ]
@@ -101,9 +141,27 @@ class PublicTrainersByBranchView(APIView):
             if branch.trainers  
         ]
 
-        return Response(data)
+        return data
+
+
+class AsyncPublicTrainersByBranchView(AsyncAPIView):
+    permission_classes = [permissions.AllowAny]
+
+    async def get(self, request):
+        return await acached_public_response(request, "trainers", lambda: self.build(request))
+
+    async def build(self, request):
+        branches = await alist(GymBranch.objects.all())
+        trainers = await alist(User.objects.filter(role=User.TRAINER, is_active=True))
+        by_branch = defaultdict(list)
+        for trainer in trainers:
+            by_branch[trainer.gym_branch_id].append(trainer)
+        for branch in branches:
+            branch.trainers = by_branch[branch.id]
+        return PublicTrainersByBranchView.serialize(request, branches)
     
 class UserViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -113,6 +171,12 @@ class UserViewSet(
 ):
     permission_classes = [permissions.IsAuthenticated]
     parser_classes = [MultiPartParser, FormParser, JSONParser]
+    pagination_class = KeysetPagination
+    conditional_fields = ("updated_at", "gym_branch__updated_at", "trainer__updated_at")
+
+    @property
+    def cursor_field(self):
+        return "risk_score" if self.action == "at_risk" else "created_at"
 
     def get_queryset(self):
         qs = User.objects.select_related("gym_branch", "trainer").filter(is_active=True)
@@ -138,7 +202,7 @@ class UserViewSet(
 
         search = self.request.query_params.get("search")
         if search:
-            qs = qs.filter(email__icontains=search)
+            qs = search_users(qs, search)
 
         return qs
 
@@ -154,7 +218,9 @@ class UserViewSet(
             return [permissions.IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER)()]
         if self.action in ("update", "partial_update"):
             return [permissions.IsAuthenticated()]
-        if self.action == "destroy":
+        if self.action == "roster":
+            return [permissions.IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER, User.TRAINER)()]
+        if self.action in ("destroy", "export", "at_risk"):
             return [permissions.IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER)()]
         if self.action in ("list", "retrieve"):
             return [permissions.IsAuthenticated()]
@@ -173,7 +239,9 @@ class UserViewSet(
         serializer = self.get_serializer(instance, data=request.data, partial=True)
         serializer.is_valid(raise_exception=True)
         serializer.save()
-        return Response(UserReadSerializer(instance).data, status=status.HTTP_200_OK)
+        return Response(
+            UserReadSerializer(instance, context=self.get_serializer_context()).data, status=status.HTTP_200_OK
+        )
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
@@ -201,4 +269,41 @@ class UserViewSet(
 
     @action(detail=False, methods=["get"], url_path="me")
     def me(self, request):
-        return Response(UserReadSerializer(request.user).data, status=status.HTTP_200_OK)
+        return Response(self.get_serializer(request.user).data, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        qs = filter_date_range(self.get_queryset(), request, "created_at")
+        return stream_export(request, qs, USER_EXPORT_FIELDS, "users")
+
+    @action(detail=False, methods=["get"], url_path="at-risk")
+    def at_risk(self, request):
+        """Members by churn risk, highest first, from the nightly ``score_members`` rows."""
+        branch = parse_branch(request)
+        qs = MemberEngagement.objects.select_related("member").order_by("-risk_score", "-member_id")
+        if request.user.role == User.MANAGER:
+            qs = qs.filter(gym_branch_id=request.user.gym_branch_id)
+        elif branch is not None:
+            qs = qs.filter(gym_branch_id=branch)
+
+        page = self.paginate_queryset(qs)
+        serializer = MemberEngagementSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+
+    @action(detail=False, methods=["get"], url_path="roster")
+    def roster(self, request):
+        """Trainer's members with task progress; managers and admins pick the trainer with ``?trainer=``."""
+        user = request.user
+        if user.role == User.TRAINER:
+            trainer_id = user.id
+        else:
+            trainers = User.objects.filter(role=User.TRAINER)
+            if user.role == User.MANAGER:
+                trainers = trainers.filter(gym_branch_id=user.gym_branch_id)
+            trainer_id = request.query_params.get("trainer")
+            if not trainer_id or not trainer_id.isdigit() or not trainers.filter(pk=trainer_id).exists():
+                return Response({"trainer": "A valid trainer id is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        page = self.paginate_queryset(trainer_roster(trainer_id))
+        serializer = RosterMemberSerializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from .models import Attendance, AttendanceArchive
+
+ARCHIVE_AFTER_DAYS = getattr(settings, "ATTENDANCE_ARCHIVE_AFTER_DAYS", 365)
+ARCHIVE_BATCH_SIZE = 5000
+ARCHIVED_FIELDS = ["id", "member_id", "gym_branch_id", "check_in", "check_out"]
+
+
+def archive_cutoff(days=None):
+    return timezone.now() - timedelta(days=ARCHIVE_AFTER_DAYS if days is None else days)
+
+
+def _closed_before(cutoff):
+    return Attendance.objects.filter(check_out__isnull=False, check_in__lt=cutoff)
+
+
+def _already_archived():
+    return Exists(AttendanceArchive.objects.filter(pk=OuterRef("pk")))
+
+
+def archivable(cutoff):
+    return _closed_before(cutoff).exclude(_already_archived())
+
+
+def id_clashes(cutoff):
+    """Closed sessions that cannot move because the archive already holds their id."""
+    return _closed_before(cutoff).filter(_already_archived())
+
+
+def archive_batch(cutoff, batch_size=ARCHIVE_BATCH_SIZE):
+    """
+    Move up to ``batch_size`` of the oldest closed sessions before ``cutoff``.
+
+    Copy and delete share one transaction, so an interrupted run loses or
+    duplicates nothing and the next run picks up where it stopped. A row whose
+    id is already archived stays where it is (see ``id_clashes``). Closed
+    sessions don't feed any branch counter, so the delete skips the model
+    signals (and the per-row fetch Django would need to send them).
+    """
+    with transaction.atomic():
+        rows = list(archivable(cutoff).order_by("id").values(*ARCHIVED_FIELDS)[:batch_size])
+        if not rows:
+            return 0
+        AttendanceArchive.objects.bulk_create([AttendanceArchive(**row) for row in rows])
+        ids = [row["id"] for row in rows]
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {Attendance._meta.db_table} WHERE id IN ({', '.join(['%s'] * len(ids))})",
+                ids,
+            )
+    return len(rows)
+
+
+def attendance_history(fields, narrow=lambda queryset: queryset):
+    """
+    Hot and archived sessions as one ``values()`` queryset.
+
+    ``narrow`` receives each table's queryset and must apply the same filters
+    to both; only ordering and slicing can follow the union.
+    """
+    hot = narrow(Attendance.objects.order_by()).values(*fields)
+    archived = narrow(AttendanceArchive.objects.order_by()).values(*fields)
+    return hot.union(archived, all=True)
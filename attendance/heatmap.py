@@ -0,0 +1,147 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .archive import attendance_history
+from .models import DailyOccupancy
+
+HOURS = 24
+MAX_HEATMAP_DAYS = 366
+HEATMAP_CHUNK_SIZE = 5000
+
+
+def _local(day, hour=0):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+def _hour_edges(first, days):
+    """UTC epoch seconds at each local wall-clock hour from ``first`` through the end of the range."""
+    edges = [_local(first + timedelta(days=d), h).timestamp() for d in range(days) for h in range(HOURS)]
+    edges.append(_local(first + timedelta(days=days)).timestamp())
+    # DST gaps can map two wall-clock hours to one instant; keep the edges sorted.
+    return np.maximum.accumulate(np.array(edges))
+
+
+def overlap_seconds(starts, ends, edges):
+    """
+    Seconds of ``[starts, ends)`` intervals falling in each ``edges`` bucket.
+
+    Each interval adds its partial first and last bucket directly and marks
+    the full buckets in between on a difference array, so the work is linear
+    in intervals plus buckets however long the sessions are.
+    """
+    buckets = len(edges) - 1
+    starts = np.clip(starts, edges[0], edges[-1])
+    ends = np.clip(ends, edges[0], edges[-1])
+    keep = ends > starts
+    starts, ends = starts[keep], ends[keep]
+
+    first = np.searchsorted(edges, starts, side="right") - 1
+    last = np.searchsorted(edges, ends, side="right") - 1
+    same = first == last
+    split = ~same
+
+    # bincount of an empty selection is int64 even with weights; keep floats.
+    totals = np.zeros(buckets + 1)
+    totals += np.bincount(first[same], weights=ends[same] - starts[same], minlength=buckets + 1).astype(float)
+    totals += np.bincount(
+        first[split], weights=edges[first[split] + 1] - starts[split], minlength=buckets + 1
+    ).astype(float)
+    totals += np.bincount(last[split], weights=ends[split] - edges[last[split]], minlength=buckets + 1).astype(float)
+
+    covered = np.bincount(first[split] + 1, minlength=buckets + 2) - np.bincount(last[split], minlength=buckets + 2)
+    totals[:buckets] += np.cumsum(covered)[:buckets] * np.diff(edges)
+    return totals[:buckets]
+
+
+def _intervals(rows, today_start, now):
+    starts, ends = [], []
+    for check_in, check_out in rows:
+        start = check_in.timestamp()
+        starts.append(start)
+        if check_out is not None:
+            ends.append(check_out.timestamp())
+        else:
+            # Still-open sessions from earlier days will be closed as
+            # zero-length visits; today's run until now.
+            ends.append(now if start >= today_start else start)
+    return np.array(starts), np.array(ends)
+
+
+def compute_daily_seconds(branch_id, first, last):
+    """``(days, 24)`` seconds of presence per local hour, streamed from hot and archived attendance."""
+    days = (last - first).days + 1
+    edges = _hour_edges(first, days)
+    now = timezone.now().timestamp()
+    today_start = _local(timezone.localdate()).timestamp()
+
+    def narrow(qs):
+        # A session can start the evening before; anything longer is a stale
+        # session that counts as zero-length anyway.
+        return qs.filter(
+            gym_branch_id=branch_id,
+            check_in__gte=_local(first - timedelta(days=1)),
+            check_in__lt=_local(last + timedelta(days=1)),
+        )
+
+    rows = attendance_history(["check_in", "check_out"], narrow).values_list("check_in", "check_out")
+    totals = np.zeros(days * HOURS)
+    chunk = []
+    for row in rows.iterator(chunk_size=HEATMAP_CHUNK_SIZE):
+        chunk.append(row)
+        if len(chunk) == HEATMAP_CHUNK_SIZE:
+            totals += overlap_seconds(*_intervals(chunk, today_start, now), edges)
+            chunk = []
+    if chunk:
+        totals += overlap_seconds(*_intervals(chunk, today_start, now), edges)
+    return totals.reshape(days, HOURS)
+
+
+def daily_seconds(branch_id, first, last):
+    """
+    ``{date: 24 hourly seconds}`` for ``first``..``last``.
+
+    Closed days come from the ``DailyOccupancy`` rollup and are computed and
+    stored once; today is always computed live.
+    """
+    today = timezone.localdate()
+    result = {
+        row.date: row.hourly_seconds
+        for row in DailyOccupancy.objects.filter(gym_branch_id=branch_id, date__range=(first, last))
+    }
+    closed_days = (first + timedelta(days=d) for d in range((min(last, today - timedelta(days=1)) - first).days + 1))
+    missing = [day for day in closed_days if day not in result]
+    if missing:
+        computed = compute_daily_seconds(branch_id, missing[0], missing[-1])
+        rollups = []
+        for day in missing:
+            seconds = [round(value) for value in computed[(day - missing[0]).days]]
+            result[day] = seconds
+            rollups.append(DailyOccupancy(gym_branch_id=branch_id, date=day, hourly_seconds=seconds))
+        DailyOccupancy.objects.bulk_create(rollups, ignore_conflicts=True)
+    if first <= today <= last:
+        result[today] = [round(value) for value in compute_daily_seconds(branch_id, today, today)[0]]
+    return result
+
+
+def occupancy_heatmap(branch_id, first, last):
+    """
+    Average members present per weekday (Monday first) and local hour.
+
+    Each cell is the presence seconds summed over the range's days with that
+    weekday, divided by one hour per such day.
+    """
+    totals = np.zeros((7, HOURS))
+    day_counts = np.zeros(7)
+    for day, seconds in daily_seconds(branch_id, first, last).items():
+        totals[day.weekday()] += seconds
+        day_counts[day.weekday()] += 1
+    averages = totals / (np.maximum(day_counts, 1)[:, None] * 3600)
+    return np.round(averages, 2).tolist()
+
+
+def invalidate_occupancy(branch_id, first, last):
+    """Drop rollups a change to sessions between ``first`` and ``last`` made stale."""
+    if first < timezone.localdate():
+        DailyOccupancy.objects.filter(gym_branch_id=branch_id, date__range=(first, last)).delete()
@@ -0,0 +1,61 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from attendance.archive import (
+    ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE, archivable, archive_batch, archive_cutoff, id_clashes,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed attendance sessions older than the retention horizon into the archive table, "
+        "in batches. Safe to interrupt and re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS,
+                            help="Archive sessions that checked in more than this many days ago.")
+        parser.add_argument("--before", help="Archive sessions that checked in before this day (YYYY-MM-DD).")
+        parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches.")
+        parser.add_argument("--pause", type=float, default=0, help="Seconds to sleep between batches.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would move.")
+
+    def handle(self, *args, days, before, batch_size, max_batches, pause, dry_run, **kwargs):
+        if before:
+            day = parse_date(before)
+            if day is None:
+                raise CommandError("--before must be YYYY-MM-DD.")
+            cutoff = timezone.make_aware(datetime.combine(day, datetime.min.time()))
+        else:
+            cutoff = archive_cutoff(days)
+
+        if dry_run:
+            self.stdout.write(f"{archivable(cutoff).count()} closed sessions before {cutoff:%Y-%m-%d %H:%M} would be archived.")
+            return
+
+        started = time.perf_counter()
+        moved = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = archive_batch(cutoff, batch_size)
+            if not count:
+                break
+            moved += count
+            batches += 1
+            self.stdout.write(f"batch {batches}: {count} rows ({moved} total)")
+            if pause:
+                time.sleep(pause)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Archived {moved} sessions before {cutoff:%Y-%m-%d %H:%M} in {batches} batches "
+            f"({time.perf_counter() - started:.1f}s)"
+        ))
+        clashes = id_clashes(cutoff).count()
+        if clashes:
+            self.stderr.write(self.style.WARNING(
+                f"{clashes} sessions were left in place because the archive already has their id."
+            ))
@@ -0,0 +1,108 @@
+import multiprocessing
+import tempfile
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from accounts.models import User
+from attendance.models import Attendance, DailyCheckIn
+from gym_branches.models import BranchStats, GymBranch
+from gym_management.database import sqlite_config
+
+BENCH_MODELS = [GymBranch, BranchStats, User, Attendance, DailyCheckIn]
+
+
+def bare_config(name):
+    """The settings before the database profile existed."""
+    return {"ENGINE": "django.db.backends.sqlite3", "NAME": name, "CONN_MAX_AGE": 0, "OPTIONS": {}}
+
+
+def _check_in(alias, branch_id, member_id, today):
+    # Same shape as attendance.services.check_in: read, then three writes.
+    with transaction.atomic(using=alias):
+        Attendance.objects.using(alias).filter(member_id=member_id, check_out__isnull=True).exists()
+        DailyCheckIn.objects.using(alias).filter(member_id=member_id, date=today).update(count=F("count") + 1)
+        now = timezone.now()
+        Attendance.objects.using(alias).bulk_create(
+            [Attendance(member_id=member_id, gym_branch_id=branch_id, check_in=now, check_out=now)]
+        )
+        BranchStats.objects.using(alias).filter(pk=branch_id).update(
+            open_attendance_count=F("open_attendance_count") + 1
+        )
+
+
+def _worker(alias, branch_id, member_id, seconds, results):
+    today = timezone.localdate()
+    committed = locked = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        try:
+            _check_in(alias, branch_id, member_id, today)
+            committed += 1
+        except OperationalError:
+            locked += 1
+        # End of "request": drops the connection unless CONN_MAX_AGE keeps it.
+        close_old_connections()
+    connections.close_all()
+    results.put((committed, locked))
+
+
+class Command(BaseCommand):
+    help = "Compare concurrent check-in write throughput on SQLite with the bare and tuned database profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workers", type=int, default=8)
+        parser.add_argument("--seconds", type=float, default=5)
+
+    def handle(self, *args, workers, seconds, **kwargs):
+        with tempfile.TemporaryDirectory() as tmp:
+            for label, profile in (("bare", bare_config), ("tuned", sqlite_config)):
+                alias = f"benchmark_{label}"
+                connections.databases[alias] = {
+                    **connections.databases["default"],
+                    "TEST": {},
+                    **profile(Path(tmp) / f"{label}.sqlite3"),
+                }
+                try:
+                    committed, locked = self.run(alias, workers, seconds)
+                finally:
+                    connections[alias].close()
+                    del connections.databases[alias]
+                self.stdout.write(
+                    f"{label:>5}: {committed / seconds:8.1f} check-ins/s, "
+                    f"{locked} failed with 'database is locked' ({workers} workers, {seconds:g}s)"
+                )
+
+    def run(self, alias, workers, seconds):
+        with connections[alias].schema_editor() as editor:
+            for model in BENCH_MODELS:
+                editor.create_model(model)
+
+        # bulk_create keeps the app's signal handlers away from the default database.
+        branch = GymBranch.objects.using(alias).bulk_create([GymBranch(name="Benchmark", location="-")])[0]
+        BranchStats.objects.using(alias).bulk_create([BranchStats(gym_branch_id=branch.pk)])
+        members = User.objects.using(alias).bulk_create([
+            User(email=f"member{i}@benchmark.test", role=User.MEMBER, gym_branch_id=branch.pk, password="!")
+            for i in range(workers)
+        ])
+        DailyCheckIn.objects.using(alias).bulk_create(
+            [DailyCheckIn(member_id=m.pk, date=timezone.localdate(), count=0) for m in members]
+        )
+        connections.close_all()
+
+        context = multiprocessing.get_context("fork")
+        results = context.Queue()
+        processes = [
+            context.Process(target=_worker, args=(alias, branch.pk, m.pk, seconds, results))
+            for m in members
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+        return sum(c for c, _ in totals), sum(l for _, l in totals)
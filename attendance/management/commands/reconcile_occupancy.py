@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from attendance.services import close_stale_sessions_before
+from gym_branches.counters import find_drift, rebuild_branch_stats
+
+OCCUPANCY_FIELD = "open_attendance_count"
+
+
+class Command(BaseCommand):
+    help = (
+        "Close sessions left open on earlier days, then recompute each branch's live occupancy "
+        "from Attendance. Meant to run nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, action="append", dest="branches",
+                            help="Limit to this branch id (repeatable).")
+        parser.add_argument("--keep-stale", action="store_true",
+                            help="Leave sessions from earlier days open.")
+
+    def handle(self, *args, branches=None, keep_stale=False, **kwargs):
+        if not keep_stale:
+            closed = 0
+            for branch_id in branches or [None]:
+                closed += close_stale_sessions_before(timezone.localdate(), branch_id=branch_id)
+            self.stdout.write(f"Closed {closed} stale session(s)")
+
+        drift = {
+            branch_id: fields[OCCUPANCY_FIELD]
+            for branch_id, fields in find_drift(branches).items()
+            if OCCUPANCY_FIELD in fields
+        }
+        for branch_id, (stored, actual) in sorted(drift.items()):
+            self.stdout.write(f"branch {branch_id}: occupancy stored={stored} actual={actual}")
+        if drift:
+            with transaction.atomic():
+                rebuild_branch_stats(list(drift))
+        self.stdout.write(self.style.SUCCESS(f"Reconciled occupancy for {len(drift)} drifted branch(es)"))
@@ -0,0 +1,77 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:06
+
+import django.db.models.deletion
+from django.conf import settings
+from collections import Counter
+
+from django.db import migrations, models
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+
+def close_duplicate_open_sessions(apps, schema_editor):
+    Attendance = apps.get_model("attendance", "Attendance")
+    BranchStats = apps.get_model("gym_branches", "BranchStats")
+
+    open_sessions = Attendance.objects.filter(check_out__isnull=True).order_by()
+    duplicated = open_sessions.values("member_id").annotate(n=Count("pk"), latest=Max("pk")).filter(n__gt=1)
+    closed = Counter()
+    for row in duplicated:
+        stale = open_sessions.filter(member_id=row["member_id"]).exclude(pk=row["latest"])
+        for branch_id in stale.values_list("gym_branch_id", flat=True):
+            closed[branch_id] += 1
+        stale.update(check_out=F("check_in"))
+
+    for branch_id, n in closed.items():
+        BranchStats.objects.filter(pk=branch_id).update(open_attendance_count=F("open_attendance_count") - n)
+
+
+def backfill_todays_check_ins(apps, schema_editor):
+    Attendance = apps.get_model("attendance", "Attendance")
+    DailyCheckIn = apps.get_model("attendance", "DailyCheckIn")
+
+    today = timezone.localdate()
+    rows = (
+        Attendance.objects.filter(check_in__date=today)
+        .order_by()
+        .values("member_id")
+        .annotate(n=Count("pk"))
+    )
+    DailyCheckIn.objects.bulk_create(
+        [DailyCheckIn(member_id=row["member_id"], date=today, count=row["n"]) for row in rows]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0002_alter_attendance_member'),
+        ('gym_branches', '0003_branchstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCheckIn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(close_duplicate_open_sessions, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendance',
+            constraint=models.UniqueConstraint(condition=models.Q(('check_out__isnull', True)), fields=('member',), name='attendance_one_open_session_per_member'),
+        ),
+        migrations.AddField(
+            model_name='dailycheckin',
+            name='member',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_check_ins', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddConstraint(
+            model_name='dailycheckin',
+            constraint=models.UniqueConstraint(fields=('member', 'date'), name='attendance_daily_check_in_per_member'),
+        ),
+        migrations.RunPython(backfill_todays_check_ins, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:11
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0003_open_session_constraint_dailycheckin'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendance',
+            name='check_in',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
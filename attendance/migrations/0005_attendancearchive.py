@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:49
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_alter_attendance_check_in'),
+        ('gym_branches', '0003_branchstats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceArchive',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('check_in', models.DateTimeField()),
+                ('check_out', models.DateTimeField()),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('gym_branch', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='archived_attendances', to='gym_branches.gymbranch')),
+                ('member', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendances', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-check_in'],
+                'indexes': [models.Index(fields=['member', 'check_in'], name='attendance__member__c276ae_idx'), models.Index(fields=['gym_branch', 'check_in'], name='attendance__gym_bra_a89e88_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendancearchive'),
+        ('gym_branches', '0003_branchstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyOccupancy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('hourly_seconds', models.JSONField(default=list)),
+                ('gym_branch', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_occupancy', to='gym_branches.gymbranch')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily occupancy',
+                'constraints': [models.UniqueConstraint(fields=('gym_branch', 'date'), name='attendance_daily_occupancy_per_branch')],
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 
 class Attendance(models.Model):
@@ -14,7 +15,7 @@ class Attendance(models.Model):
         on_delete=models.PROTECT,
         related_name="attendances",
     )
-    check_in = models.DateTimeField(auto_now_add=True)
+    check_in = models.DateTimeField(default=timezone.now, editable=False)
     check_out = models.DateTimeField(null=True, blank=True)
 
     class Meta:
@@ -23,6 +24,13 @@ class Attendance(models.Model):
             models.Index(fields=["member", "check_in"]),
             models.Index(fields=["gym_branch", "check_in"]),
         ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["member"],
+                condition=models.Q(check_out__isnull=True),
+                name="attendance_one_open_session_per_member",
+            ),
+        ]
 
     def clean(self):
         super().clean()
@@ -33,8 +41,78 @@ class Attendance(models.Model):
                 raise ValidationError({"gym_branch": "Member does not belong to this branch."})
 
     def save(self, *args, **kwargs):
-        self.full_clean()
+        # Foreign keys and the open-session constraint are enforced by the
+        # database; checking them here would cost extra queries per check-in.
+        self.full_clean(exclude=["member", "gym_branch"], validate_constraints=False)
         super().save(*args, **kwargs)
 
     def __str__(self):
-        return f"{self.member.email} - {self.check_in.date()}"
\ No newline at end of file
+        return f"{self.member.email} - {self.check_in.date()}"
+
+
+class DailyCheckIn(models.Model):
+    member = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="daily_check_ins",
+    )
+    date = models.DateField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["member", "date"], name="attendance_daily_check_in_per_member"),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id} - {self.date}: {self.count}"
+
+
+class AttendanceArchive(models.Model):
+    """Closed sessions moved out of ``Attendance`` by ``archive_attendance``; ids are kept."""
+
+    id = models.BigIntegerField(primary_key=True)
+    member = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="archived_attendances",
+    )
+    gym_branch = models.ForeignKey(
+        "gym_branches.GymBranch",
+        on_delete=models.PROTECT,
+        related_name="archived_attendances",
+    )
+    check_in = models.DateTimeField()
+    check_out = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-check_in"]
+        indexes = [
+            models.Index(fields=["member", "check_in"]),
+            models.Index(fields=["gym_branch", "check_in"]),
+        ]
+
+    def __str__(self):
+        return f"{self.member_id} - {self.check_in.date()} (archived)"
+
+
+class DailyOccupancy(models.Model):
+    """Heatmap rollup: seconds members spent in a branch during each local hour of a closed day."""
+
+    gym_branch = models.ForeignKey(
+        "gym_branches.GymBranch",
+        on_delete=models.CASCADE,
+        related_name="daily_occupancy",
+    )
+    date = models.DateField()
+    hourly_seconds = models.JSONField(default=list)
+
+    class Meta:
+        verbose_name_plural = "Daily occupancy"
+        constraints = [
+            models.UniqueConstraint(fields=["gym_branch", "date"], name="attendance_daily_occupancy_per_branch"),
+        ]
+
+    def __str__(self):
+        return f"{self.gym_branch_id} - {self.date}"
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from .models import Attendance
-from django.utils import timezone
+from .services import CHECK_IN, CHECK_OUT, MAX_BATCH_EVENTS, check_in
 
 class AttendanceSerializer(serializers.ModelSerializer):
     member_email = serializers.EmailField(source="member.email", read_only=True)
@@ -27,29 +27,18 @@ class AttendanceSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("Only check_out can be updated.")
             return attrs
 
-        member = user
-        branch = member.gym_branch
-        today = timezone.now().date()
+        attrs["member"] = user
+        return attrs
 
-        daily_count = Attendance.objects.filter(
-            member=member,
-            check_in__date=today,
-        ).count()
+    def create(self, validated_data):
+        return check_in(validated_data["member"])
 
-        if daily_count >= 3:
-            raise serializers.ValidationError(
-                "You have reached the maximum check-ins (3) for today."
-            )
 
-        already_checked_in = Attendance.objects.filter(
-            member=member,
-            check_in__date=today,
-            check_out__isnull=True,
-        ).exists()
+class AttendanceEventSerializer(serializers.Serializer):
+    member = serializers.IntegerField()
+    type = serializers.ChoiceField(choices=[CHECK_IN, CHECK_OUT])
+    timestamp = serializers.DateTimeField()
 
-        if already_checked_in:
-            raise serializers.ValidationError("Already checked in. Please check out first.")
 
-        attrs["member"] = member
-        attrs["gym_branch"] = branch
-        return attrs
\ No newline at end of file
+class AttendanceBatchSerializer(serializers.Serializer):
+    events = AttendanceEventSerializer(many=True, allow_empty=False, max_length=MAX_BATCH_EVENTS)
@@ -0,0 +1,249 @@
+from collections import Counter, defaultdict
+from datetime import datetime, time
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+from rest_framework import serializers
+
+from .heatmap import invalidate_occupancy
+from .models import Attendance, DailyCheckIn
+from accounts.models import User
+from gym_branches.counters import bump, rebuild_branch_stats
+from gym_branches.models import BranchStats
+from gym_branches.signals import mark_counted
+
+MAX_DAILY_CHECK_INS = 3
+
+DAILY_LIMIT_MESSAGE = f"You have reached the maximum check-ins ({MAX_DAILY_CHECK_INS}) for today."
+ALREADY_CHECKED_IN_MESSAGE = "Already checked in. Please check out first."
+BRANCH_FULL_MESSAGE = "The branch is at capacity. Please try again later."
+
+
+def start_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _claim_daily_slot(member_id, day):
+    slots = DailyCheckIn.objects.filter(member_id=member_id, date=day, count__lt=MAX_DAILY_CHECK_INS)
+    if slots.update(count=F("count") + 1):
+        return
+    try:
+        # Only the first check-in of the day pays for this savepoint.
+        with transaction.atomic():
+            DailyCheckIn.objects.create(member_id=member_id, date=day, count=1)
+    except IntegrityError:
+        # The row exists, so either the cap is reached or another request
+        # created it between our UPDATE and INSERT; retry the UPDATE once.
+        if not slots.update(count=F("count") + 1):
+            raise serializers.ValidationError(DAILY_LIMIT_MESSAGE)
+
+
+def _claim_branch_slot(branch, day):
+    # The occupancy counter doubles as the capacity check: a conditional
+    # UPDATE, so concurrent check-ins cannot overfill the branch.
+    if not branch.capacity:
+        bump(branch.pk, open_attendance_count=1)
+        return
+    slots = BranchStats.objects.filter(pk=branch.pk, open_attendance_count__lt=branch.capacity)
+    if slots.update(open_attendance_count=F("open_attendance_count") + 1):
+        return
+    if not BranchStats.objects.filter(pk=branch.pk).exists():
+        # No counter row (e.g. after loaddata, which skips the signal that
+        # creates it): count the branch, then claim as usual.
+        rebuild_branch_stats([branch.pk])
+        if slots.update(open_attendance_count=F("open_attendance_count") + 1):
+            return
+    # Yesterday's forgotten check-outs may be holding the slots.
+    if not (close_stale_sessions_before(day, branch_id=branch.pk) and slots.update(
+        open_attendance_count=F("open_attendance_count") + 1
+    )):
+        raise serializers.ValidationError(BRANCH_FULL_MESSAGE)
+
+
+def _check_in(member, day):
+    with transaction.atomic():
+        _claim_daily_slot(member.id, day)
+        _claim_branch_slot(member.gym_branch, day)
+        # bulk_create skips the BranchStats signal; the slot claim counted it.
+        attendance = Attendance.objects.bulk_create([Attendance(member=member, gym_branch=member.gym_branch)])[0]
+        mark_counted(attendance)
+        return attendance
+
+
+def _close_stale(sessions, day):
+    stale = sessions.filter(check_out__isnull=True, check_in__lt=start_of_day(day))
+    with transaction.atomic():
+        closed = Counter(stale.values_list("gym_branch_id", flat=True))
+        if closed:
+            stale.update(check_out=F("check_in"))
+            for branch_id, n in closed.items():
+                bump(branch_id, open_attendance_count=-n)
+    return sum(closed.values())
+
+
+def close_stale_sessions(member_id, day):
+    """Close sessions left open before ``day``; they count as zero-length visits."""
+    return _close_stale(Attendance.objects.filter(member_id=member_id), day)
+
+
+def close_stale_sessions_before(day, branch_id=None):
+    """Close every session (optionally one branch's) left open before ``day``."""
+    sessions = Attendance.objects.all()
+    if branch_id is not None:
+        sessions = sessions.filter(gym_branch_id=branch_id)
+    return _close_stale(sessions, day)
+
+
+def check_in(member):
+    """
+    Check ``member`` in, enforcing one open session, the daily cap and the
+    branch capacity.
+
+    The daily cap and capacity are conditional UPDATEs on the member's
+    DailyCheckIn row and the branch's occupancy counter, and the open-session
+    rule is the partial unique index on Attendance, so all three hold under
+    concurrent requests without a read-then-write race.
+    """
+    today = timezone.localdate()
+    try:
+        return _check_in(member, today)
+    except IntegrityError:
+        if not close_stale_sessions(member.id, today):
+            raise serializers.ValidationError(ALREADY_CHECKED_IN_MESSAGE)
+
+    try:
+        return _check_in(member, today)
+    except IntegrityError:
+        raise serializers.ValidationError(ALREADY_CHECKED_IN_MESSAGE)
+
+
+CHECK_IN, CHECK_OUT = "check_in", "check_out"
+INGEST_BATCH_SIZE = 500
+MAX_BATCH_EVENTS = 5000
+
+
+def _event_error(member, branch_id):
+    if member is None:
+        return "Unknown member."
+    if member["role"] != User.MEMBER:
+        return "Only members can have attendance."
+    if not member["is_active"]:
+        return "Account is disabled."
+    if branch_id is not None and member["gym_branch_id"] != branch_id:
+        return "Member does not belong to this branch."
+    return None
+
+
+def ingest_events(events, branch_id=None):
+    """
+    Apply a batch of buffered turnstile events with a fixed number of queries.
+
+    ``events`` are dicts with ``member`` (id), ``type`` (check_in/check_out)
+    and ``timestamp``. Events are replayed in timestamp order against the
+    members' open sessions and daily counters, which are loaded once up front,
+    then written with ``bulk_create``/``bulk_update``. ``branch_id`` restricts
+    the batch to one branch's members. Returns one result per event, in input
+    order.
+
+    Branch capacity is not enforced: the events record entries the door
+    already let through, so they are counted even if the branch is over
+    capacity, and single check-ins are refused until it drops again.
+    """
+    member_ids = {event["member"] for event in events}
+    days = {timezone.localdate(event["timestamp"]) for event in events}
+    results = [None] * len(events)
+
+    with transaction.atomic():
+        members = {
+            row["id"]: row
+            for row in User.objects.filter(pk__in=member_ids).values("id", "role", "is_active", "gym_branch_id")
+        }
+        open_sessions = {
+            session.member_id: session
+            for session in Attendance.objects.select_for_update().filter(
+                member_id__in=member_ids, check_out__isnull=True
+            )
+        }
+        counters = {
+            (counter.member_id, counter.date): counter
+            for counter in DailyCheckIn.objects.select_for_update().filter(
+                member_id__in=member_ids, date__in=days
+            )
+        }
+
+        created, closed, touched_counters = [], {}, {}
+        for index in sorted(range(len(events)), key=lambda i: (events[i]["timestamp"], i)):
+            event = events[index]
+            member = members.get(event["member"])
+            error = _event_error(member, branch_id)
+            if error:
+                results[index] = {"index": index, "status": "rejected", "error": error}
+                continue
+
+            member_id, timestamp = member["id"], event["timestamp"]
+            session = open_sessions.get(member_id)
+
+            if event["type"] == CHECK_OUT:
+                if session is None or session.check_in > timestamp:
+                    results[index] = {"index": index, "status": "rejected", "error": "No open session to check out."}
+                    continue
+                session.check_out = timestamp
+                if session.pk:
+                    closed[session.pk] = session
+                del open_sessions[member_id]
+                results[index] = {"index": index, "status": "checked_out", "attendance": session}
+                continue
+
+            day = timezone.localdate(timestamp)
+            if session is not None and session.check_in < start_of_day(day):
+                session.check_out = session.check_in
+                if session.pk:
+                    closed[session.pk] = session
+                del open_sessions[member_id]
+                session = None
+            if session is not None:
+                results[index] = {"index": index, "status": "rejected", "error": ALREADY_CHECKED_IN_MESSAGE}
+                continue
+
+            counter = counters.setdefault((member_id, day), DailyCheckIn(member_id=member_id, date=day, count=0))
+            if counter.count >= MAX_DAILY_CHECK_INS:
+                results[index] = {"index": index, "status": "rejected", "error": DAILY_LIMIT_MESSAGE}
+                continue
+            counter.count += 1
+            touched_counters[(member_id, day)] = counter
+
+            session = Attendance(member_id=member_id, gym_branch_id=member["gym_branch_id"], check_in=timestamp)
+            created.append(session)
+            open_sessions[member_id] = session
+            results[index] = {"index": index, "status": "checked_in", "attendance": session}
+
+        # Close stored sessions first: a member's new open session would clash
+        # with the old one under attendance_one_open_session_per_member.
+        Attendance.objects.bulk_update(closed.values(), ["check_out"], batch_size=INGEST_BATCH_SIZE)
+        Attendance.objects.bulk_create(created, batch_size=INGEST_BATCH_SIZE)
+        DailyCheckIn.objects.bulk_update(
+            [c for c in touched_counters.values() if c.pk], ["count"], batch_size=INGEST_BATCH_SIZE
+        )
+        DailyCheckIn.objects.bulk_create(
+            [c for c in touched_counters.values() if not c.pk], batch_size=INGEST_BATCH_SIZE
+        )
+
+        # Bulk writes skip the signal handlers that keep BranchStats in sync.
+        open_delta = Counter(s.gym_branch_id for s in created if s.check_out is None)
+        open_delta.subtract(s.gym_branch_id for s in closed.values())
+        for branch, delta in open_delta.items():
+            bump(branch, open_attendance_count=delta)
+
+        # Buffered uploads can land on days the heatmap already rolled up.
+        touched_days = defaultdict(set)
+        for session in [*created, *closed.values()]:
+            touched_days[session.gym_branch_id].add(timezone.localdate(session.check_in))
+            touched_days[session.gym_branch_id].add(timezone.localdate(session.check_out or session.check_in))
+        for branch, days in touched_days.items():
+            invalidate_occupancy(branch, min(days), max(days))
+
+    for result in results:
+        if "attendance" in result:
+            result["attendance"] = result["attendance"].pk
+    return results
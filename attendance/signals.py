@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .heatmap import invalidate_occupancy
+from .models import Attendance
+
+
+@receiver([post_save, post_delete], sender=Attendance)
+def attendance_changed(sender, instance, raw=False, **kwargs):
+    # Today's sessions only affect the live part of the heatmap; older ones
+    # invalidate the rollups they overlap.
+    if raw:
+        return
+    start = timezone.localdate(instance.check_in)
+    end = timezone.localdate(instance.check_out) if instance.check_out else timezone.localdate()
+    invalidate_occupancy(instance.gym_branch_id, start, end)
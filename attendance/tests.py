@@ -1,3 +1,356 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+import numpy as np
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from gym_branches.counters import find_drift
+from gym_branches.models import BranchStats, GymBranch
+from .archive import archive_batch, archive_cutoff, attendance_history
+from .heatmap import _local, overlap_seconds
+from .models import Attendance, AttendanceArchive, DailyCheckIn
+from .services import MAX_DAILY_CHECK_INS, check_in
+
+
+class ConcurrentCheckInTests(TransactionTestCase):
+    threads = 8
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch
+        )
+        self.member = User.objects.create_user(
+            "member@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=trainer
+        )
+
+    def run_concurrently(self, worker):
+        barrier = threading.Barrier(self.threads)
+        outcomes = []
+
+        def target():
+            member = self.retrying(User.objects.select_related("gym_branch").get, pk=self.member.pk)
+            barrier.wait()
+            try:
+                outcomes.extend(worker(member))
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=target) for _ in range(self.threads)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return outcomes
+
+    def retrying(self, fn, *args, **kwargs):
+        # SQLite's shared in-memory test database refuses concurrent writers
+        # with "table is locked" instead of waiting; the write simply did not
+        # happen, so retry until it is decided.
+        for _ in range(1000):
+            try:
+                return fn(*args, **kwargs)
+            except OperationalError:
+                continue
+        return fn(*args, **kwargs)
+
+    def attempt(self, member):
+        try:
+            return self.retrying(check_in, member)
+        except serializers.ValidationError:
+            return None
+
+    def test_only_one_open_session_under_concurrent_check_ins(self):
+        outcomes = self.run_concurrently(lambda member: [self.attempt(member)])
+
+        self.assertEqual(len([a for a in outcomes if a]), 1)
+        self.assertEqual(Attendance.objects.filter(member=self.member, check_out__isnull=True).count(), 1)
+        self.assertEqual(DailyCheckIn.objects.get(member=self.member).count, 1)
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).open_attendance_count, 1)
+
+    def test_daily_cap_holds_under_concurrent_check_in_and_out(self):
+        def worker(member):
+            results = []
+            for _ in range(MAX_DAILY_CHECK_INS + 1):
+                attendance = self.attempt(member)
+                results.append(attendance)
+                if attendance:
+                    attendance.check_out = timezone.now()
+                    self.retrying(attendance.save)
+            return results
+
+        outcomes = self.run_concurrently(worker)
+
+        today = timezone.localdate()
+        self.assertEqual(len([a for a in outcomes if a]), MAX_DAILY_CHECK_INS)
+        self.assertEqual(Attendance.objects.filter(member=self.member, check_in__date=today).count(), MAX_DAILY_CHECK_INS)
+        self.assertEqual(DailyCheckIn.objects.get(member=self.member, date=today).count, MAX_DAILY_CHECK_INS)
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).open_attendance_count, 0)
+
+    def test_stale_open_session_is_closed_on_next_check_in(self):
+        stale = check_in(self.member)
+        Attendance.objects.filter(pk=stale.pk).update(check_in=timezone.now() - timezone.timedelta(days=1))
+
+        check_in(self.member)
+
+        stale.refresh_from_db()
+        self.assertEqual(stale.check_out, stale.check_in)
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).open_attendance_count, 1)
+
+    def test_capacity_is_enforced_and_stale_sessions_free_slots(self):
+        self.branch.capacity = 1
+        self.branch.save()
+        other = User.objects.create_user(
+            "other@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch,
+            trainer=self.member.trainer,
+        )
+        stale = check_in(self.member)
+
+        with self.assertRaises(serializers.ValidationError):
+            check_in(User.objects.select_related("gym_branch").get(pk=other.pk))
+
+        Attendance.objects.filter(pk=stale.pk).update(check_in=timezone.now() - timezone.timedelta(days=1))
+        check_in(User.objects.select_related("gym_branch").get(pk=other.pk))
+
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).open_attendance_count, 1)
+
+    def test_capacity_without_a_counter_row_recounts_the_branch(self):
+        self.branch.capacity = 1
+        self.branch.save()
+        BranchStats.objects.filter(pk=self.branch.pk).delete()
+
+        check_in(self.member)
+
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).open_attendance_count, 1)
+
+
+class OverlapSecondsTests(SimpleTestCase):
+    edges = np.arange(0, 7 * 3600 + 1, 3600, dtype=float)
+
+    def brute_force(self, starts, ends):
+        totals = np.zeros(len(self.edges) - 1)
+        for start, end in zip(starts, ends):
+            for i in range(len(totals)):
+                totals[i] += max(0, min(end, self.edges[i + 1]) - max(start, self.edges[i]))
+        return totals
+
+    def check(self, starts, ends):
+        starts, ends = np.array(starts, dtype=float), np.array(ends, dtype=float)
+        np.testing.assert_allclose(overlap_seconds(starts, ends, self.edges), self.brute_force(starts, ends))
+
+    def test_sessions_crossing_hours(self):
+        self.check([1800, 3600, 5000], [5400, 18000, 5100])
+
+    def test_only_crossing_sessions(self):
+        self.check([1800], [5400])
+
+    def test_sessions_clipped_to_the_range(self):
+        self.check([-7200, 20000, 30000], [1800, 40000, 50000])
+
+    def test_random_sessions(self):
+        rng = np.random.default_rng(1)
+        starts = rng.uniform(-3600, 8 * 3600, 200)
+        self.check(starts, starts + rng.uniform(0, 4 * 3600, 200))
+
+    def test_empty(self):
+        self.check([], [])
+
+
+class HeatmapEndpointTests(TestCase):
+    url = "/api/v1/attendance/heatmap/"
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        trainer = User.objects.create_user("trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch)
+        self.member = User.objects.create_user(
+            "member@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=trainer
+        )
+        self.manager = User.objects.create_user(
+            "manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=self.branch
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_single_visit_crossing_an_hour(self):
+        yesterday = timezone.localdate() - timedelta(days=1)
+        session = Attendance.objects.create(member=self.member, gym_branch=self.branch)
+        Attendance.objects.filter(pk=session.pk).update(
+            check_in=_local(yesterday, 10) + timedelta(minutes=30),
+            check_out=_local(yesterday, 11) + timedelta(minutes=30),
+        )
+
+        response = self.client.get(self.url, {"from": yesterday, "to": yesterday})
+
+        self.assertEqual(response.status_code, 200)
+        row = response.data["results"][0]["matrix"][yesterday.weekday()]
+        self.assertEqual(row[10], 0.5)
+        self.assertEqual(row[11], 0.5)
+        self.assertEqual(sum(row), 1.0)
+
+    def test_invalid_branch_is_a_bad_request(self):
+        self.client.force_authenticate(User.objects.create_superuser("admin@test.com", "Admin@1234"))
+        for url in (self.url, "/api/v1/attendance/export/"):
+            self.assertEqual(self.client.get(url, {"branch": "abc"}).status_code, 400)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        trainer = User.objects.create_user("trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch)
+        self.member = User.objects.create_user(
+            "member@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=trainer
+        )
+        self.cutoff = archive_cutoff()
+        self.old = [self.session(days_ago=400 + i) for i in range(5)]
+        self.recent = self.session(days_ago=1)
+
+    def session(self, days_ago):
+        session = Attendance.objects.create(member=self.member, gym_branch=self.branch)
+        check_in = timezone.now() - timedelta(days=days_ago)
+        Attendance.objects.filter(pk=session.pk).update(check_in=check_in, check_out=check_in + timedelta(hours=1))
+        return session.pk
+
+    def test_batches_move_old_closed_sessions_only(self):
+        self.assertEqual([archive_batch(self.cutoff, batch_size=2) for _ in range(4)], [2, 2, 1, 0])
+        self.assertEqual(list(Attendance.objects.values_list("pk", flat=True)), [self.recent])
+        self.assertEqual(sorted(AttendanceArchive.objects.values_list("pk", flat=True)), self.old)
+
+    def test_interrupted_run_resumes_where_it_stopped(self):
+        call_command("archive_attendance", batch_size=2, max_batches=1, stdout=StringIO())
+        self.assertEqual(AttendanceArchive.objects.count(), 2)
+
+        call_command("archive_attendance", batch_size=2, stdout=StringIO())
+        self.assertEqual(AttendanceArchive.objects.count(), 5)
+        self.assertEqual(Attendance.objects.count(), 1)
+
+    def test_id_already_in_the_archive_keeps_the_hot_row(self):
+        clash = Attendance.objects.get(pk=self.old[0])
+        AttendanceArchive.objects.create(
+            id=clash.pk, member=self.member, gym_branch=self.branch,
+            check_in=clash.check_in - timedelta(days=1), check_out=clash.check_out - timedelta(days=1),
+        )
+        stderr = StringIO()
+
+        call_command("archive_attendance", stdout=StringIO(), stderr=stderr)
+
+        self.assertTrue(Attendance.objects.filter(pk=clash.pk, check_in=clash.check_in).exists())
+        self.assertEqual(AttendanceArchive.objects.count(), 5)
+        self.assertIn("1 sessions were left in place", stderr.getvalue())
+
+    def test_history_unions_hot_and_archived_sessions(self):
+        archive_batch(self.cutoff, batch_size=2)
+        history = attendance_history(("id",), lambda queryset: queryset.filter(member=self.member))
+        self.assertEqual(sorted(row["id"] for row in history), sorted(self.old + [self.recent]))
+
+
+class BulkIngestTests(TestCase):
+    url = "/api/v1/attendance/bulk/"
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        other_branch = GymBranch.objects.create(name="Other Branch", location="Dhaka")
+        trainer = User.objects.create_user("trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch)
+        self.members = [
+            User.objects.create_user(
+                f"member{i}@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=trainer
+            )
+            for i in range(10)
+        ]
+        other_trainer = User.objects.create_user(
+            "trainer2@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=other_branch
+        )
+        self.outsider = User.objects.create_user(
+            "outsider@test.com", "Member@1234", role=User.MEMBER, gym_branch=other_branch, trainer=other_trainer
+        )
+        self.day = timezone.localdate() - timedelta(days=1)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(
+            "manager@test.com", "Manager@1234", role=User.MANAGER, gym_branch=self.branch
+        ))
+
+    def event(self, member, type, hour):
+        return {"member": member.pk, "type": type, "timestamp": _local(self.day, hour).isoformat()}
+
+    def post(self, events):
+        response = self.client.post(self.url, {"events": events}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return [result["status"] for result in response.data["results"]]
+
+    def test_replays_events_in_timestamp_order(self):
+        member = self.members[0]
+        statuses = self.post([
+            self.event(member, "check_in", 11),
+            self.event(member, "check_out", 10),
+            self.event(member, "check_in", 9),
+            self.event(self.members[1], "check_out", 9),
+            self.event(self.outsider, "check_in", 9),
+        ])
+
+        self.assertEqual(statuses, ["checked_in", "checked_out", "checked_in", "rejected", "rejected"])
+        sessions = Attendance.objects.filter(member=member).order_by("check_in")
+        self.assertEqual(
+            [(s.check_in, s.check_out) for s in sessions],
+            [(_local(self.day, 9), _local(self.day, 10)), (_local(self.day, 11), None)],
+        )
+        self.assertEqual(DailyCheckIn.objects.get(member=member, date=self.day).count, 2)
+        self.assertFalse(Attendance.objects.filter(member=self.outsider).exists())
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).open_attendance_count, 1)
+        self.assertEqual(find_drift(), {})
+
+    def open_session(self, member, check_in):
+        session = Attendance.objects.create(member=member, gym_branch=self.branch)
+        Attendance.objects.filter(pk=session.pk).update(check_in=check_in)
+        return session.pk
+
+    def test_closes_a_stored_open_session_before_opening_the_next(self):
+        member = self.members[0]
+        stored = self.open_session(member, _local(self.day, 8))
+
+        statuses = self.post([self.event(member, "check_out", 9), self.event(member, "check_in", 10)])
+
+        self.assertEqual(statuses, ["checked_out", "checked_in"])
+        self.assertEqual(Attendance.objects.get(pk=stored).check_out, _local(self.day, 9))
+        self.assertEqual(Attendance.objects.filter(member=member, check_out__isnull=True).count(), 1)
+        self.assertEqual(find_drift(), {})
+
+    def test_stale_session_from_the_day_before_is_closed_on_check_in(self):
+        member = self.members[0]
+        stale_check_in = _local(self.day - timedelta(days=1), 18)
+        stale = self.open_session(member, stale_check_in)
+
+        self.assertEqual(self.post([self.event(member, "check_in", 9)]), ["checked_in"])
+
+        self.assertEqual(Attendance.objects.get(pk=stale).check_out, stale_check_in)
+        self.assertEqual(
+            Attendance.objects.get(member=member, check_out__isnull=True).check_in, _local(self.day, 9)
+        )
+        self.assertEqual(find_drift(), {})
+
+    def test_daily_limit_spans_the_batch(self):
+        member = self.members[0]
+        events = []
+        for hour in range(MAX_DAILY_CHECK_INS + 1):
+            events += [self.event(member, "check_in", 8 + 2 * hour), self.event(member, "check_out", 9 + 2 * hour)]
+
+        statuses = self.post(events)
+
+        self.assertEqual(statuses[-2:], ["rejected", "rejected"])
+        self.assertEqual(Attendance.objects.filter(member=member).count(), MAX_DAILY_CHECK_INS)
+
+    def test_query_count_does_not_grow_with_the_batch(self):
+        def queries(members):
+            events = [self.event(member, "check_in", 9) for member in members]
+            events += [self.event(member, "check_out", 10) for member in members]
+            with CaptureQueriesContext(connection) as captured:
+                self.post(events)
+            return len(captured)
+
+        self.assertEqual(queries(self.members[:2]), queries(self.members[2:]))
@@ -1,10 +1,21 @@
+from django.conf import settings
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import AttendanceViewSet
+from gym_management.async_views import async_reads
+from .views import AttendanceViewSet, AsyncAttendanceListView
 
 router = DefaultRouter()
 router.register(r"", AttendanceViewSet, basename="attendance")
 
 app_name = "attendance"
 
-urlpatterns = router.urls
\ No newline at end of file
+urlpatterns = router.urls
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path(
+            "",
+            async_reads(AsyncAttendanceListView.as_view(), AttendanceViewSet.as_view({"get": "list", "post": "create"})),
+            name="attendance-list-async",
+        ),
+    ] + urlpatterns
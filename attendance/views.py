@@ -1,12 +1,30 @@
+from datetime import timedelta
+
 from rest_framework import mixins, viewsets, permissions, status
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
+from django.db import IntegrityError
 from django.utils import timezone
 
+from .archive import attendance_history
+from .heatmap import MAX_HEATMAP_DAYS, occupancy_heatmap
 from .models import Attendance
-from .serializers import AttendanceSerializer
+from .serializers import AttendanceSerializer, AttendanceBatchSerializer
+from .services import ingest_events
 from accounts.models import User
 from accounts.permissions import role_required
+from gym_branches.models import GymBranch
+from gym_management.async_views import AsyncAPIView
+from gym_management.export import filter_date_range, parse_branch, parse_date_range, stream_export
+from gym_management.pagination import KeysetPagination
+
+HEATMAP_DEFAULT_DAYS = 28
+
+EXPORT_FIELDS = [
+    "id", "member_id", "member__email", "member__full_name",
+    "gym_branch_id", "gym_branch__name", "check_in", "check_out",
+]
 
 
 class AttendanceViewSet(
@@ -17,6 +35,8 @@ class AttendanceViewSet(
     viewsets.GenericViewSet,
 ):
     serializer_class = AttendanceSerializer
+    pagination_class = KeysetPagination
+    cursor_field = "check_in"
 
     def get_permissions(self):
         if self.action == "create":
@@ -25,12 +45,16 @@ class AttendanceViewSet(
             return [permissions.IsAuthenticated(), role_required(User.MEMBER)()]
         if self.action == "destroy":
             return [permissions.IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER, User.MEMBER)()]
+        if self.action == "bulk":
+            return [permissions.IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER)()]
         return [permissions.IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER, User.TRAINER)()]
 
     def get_queryset(self):
-        user = self.request.user
-        qs = Attendance.objects.select_related("member", "gym_branch")
+        return self.scope(Attendance.objects.select_related("member", "gym_branch"))
 
+    def scope(self, qs):
+        """Limit ``qs`` (hot or archived attendance) to what the caller may see."""
+        user = self.request.user
         if user.role == User.SUPER_ADMIN:
             return qs
         if user.role in (User.MANAGER, User.TRAINER):
@@ -38,11 +62,75 @@ class AttendanceViewSet(
         if user.role == User.MEMBER:
             return qs.filter(member_id=user.id)
 
-        return Attendance.objects.none()
+        return qs.none()
 
     def perform_create(self, serializer):
         serializer.save(member=self.request.user, gym_branch=self.request.user.gym_branch,
     )
 
     def perform_update(self, serializer):
-        serializer.save(check_out=timezone.now())
\ No newline at end of file
+        serializer.save(check_out=timezone.now())
+
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        serializer = AttendanceBatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        branch_id = None if request.user.role == User.SUPER_ADMIN else request.user.gym_branch_id
+        try:
+            results = ingest_events(serializer.validated_data["events"], branch_id)
+        except IntegrityError:
+            return Response(
+                {"detail": "Another check-in for these members happened meanwhile. Please retry the batch."},
+                status=status.HTTP_409_CONFLICT,
+            )
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="heatmap")
+    def heatmap(self, request):
+        start, end = parse_date_range(request)
+        end = end or timezone.localdate()
+        start = start or end - timedelta(days=HEATMAP_DEFAULT_DAYS - 1)
+        if (end - start).days >= MAX_HEATMAP_DAYS:
+            raise ValidationError({"from": f"The range can span at most {MAX_HEATMAP_DAYS} days."})
+
+        branch = parse_branch(request)
+        branches = GymBranch.objects.order_by("pk")
+        if request.user.role != User.SUPER_ADMIN:
+            branches = branches.filter(pk=request.user.gym_branch_id)
+        elif branch is not None:
+            branches = branches.filter(pk=branch)
+
+        return Response({
+            "from": start,
+            "to": end,
+            "results": [
+                {"gym_branch": pk, "gym_branch_name": name, "matrix": occupancy_heatmap(pk, start, end)}
+                for pk, name in branches.values_list("pk", "name")
+            ],
+        })
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        branch = parse_branch(request)
+
+        def narrow(qs):
+            qs = filter_date_range(self.scope(qs), request, "check_in")
+            return qs.filter(gym_branch_id=branch) if branch is not None else qs
+
+        qs = attendance_history(EXPORT_FIELDS, narrow).order_by("-check_in")
+        return stream_export(request, qs, EXPORT_FIELDS, "attendance")
+
+
+class AsyncAttendanceListView(AsyncAPIView):
+    permission_classes = [permissions.IsAuthenticated, role_required(User.SUPER_ADMIN, User.MANAGER, User.TRAINER)]
+    pagination_class = KeysetPagination
+    cursor_field = "check_in"
+    get_queryset = AttendanceViewSet.get_queryset
+    scope = AttendanceViewSet.scope
+
+    async def get(self, request):
+        paginator = self.pagination_class()
+        rows = await paginator.apaginate_queryset(self.get_queryset(), request, view=self)
+        data = AttendanceSerializer(rows, many=True, context={"request": request}).data
+        return paginator.get_paginated_response(data)
@@ -0,0 +1,24 @@
+import os
+import shutil
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Same .env as the Django settings, loaded before the workers fork so the
+# master's hooks and every worker agree on PROMETHEUS_MULTIPROC_DIR.
+load_dotenv(Path(__file__).resolve().parent / ".env")
+
+
+def on_starting(server):
+    # Samples left by a previous master would be summed into the new one's.
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import GymBranch
+from .models import GymBranch, BranchStats
 
 @admin.register(GymBranch)
 class GymBranchAdmin(admin.ModelAdmin):
@@ -7,3 +7,15 @@ class GymBranchAdmin(admin.ModelAdmin):
     search_fields = ("name", "location")
     ordering = ("-created_at",)
     readonly_fields = ("created_at",)
+
+
+@admin.register(BranchStats)
+class BranchStatsAdmin(admin.ModelAdmin):
+    list_display = ("gym_branch", *BranchStats.COUNTER_FIELDS)
+    list_select_related = ("gym_branch",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class GymBranchesConfig(AppConfig):
     name = 'gym_branches'
+
+    def ready(self):
+        from . import signals  # noqa: F401
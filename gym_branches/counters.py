@@ -0,0 +1,113 @@
+from collections import defaultdict
+
+from django.db.models import Count, F
+
+from .models import BranchStats, GymBranch
+
+ROLE_COUNTERS = {
+    "gym_manager": "manager_count",
+    "trainer": "trainer_count",
+    "member": "member_count",
+}
+
+TASK_STATUS_COUNTERS = {
+    "pending": "pending_task_count",
+    "in_progress": "in_progress_task_count",
+    "completed": "completed_task_count",
+}
+
+
+def bump(branch_id, **deltas):
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if branch_id is None or not deltas:
+        return
+    BranchStats.objects.filter(pk=branch_id).update(
+        **{field: F(field) + delta for field, delta in deltas.items()}
+    )
+
+
+def move(old, new):
+    """Shift one unit between two ``(branch_id, counter)`` contributions."""
+    if old == new:
+        return
+    if old and new and old[0] == new[0]:
+        bump(old[0], **{old[1]: -1, new[1]: 1})
+        return
+    if old:
+        bump(old[0], **{old[1]: -1})
+    if new:
+        bump(new[0], **{new[1]: 1})
+
+
+def get_counter(branch_id, field):
+    counters = BranchStats.objects.filter(pk=branch_id).values_list(field, flat=True)
+    value = counters.first()
+    if value is None and branch_id is not None and rebuild_branch_stats([branch_id]):
+        # No counter row (e.g. after loaddata): count the branch instead of reading zero.
+        value = counters.first()
+    return value or 0
+
+
+def compute_branch_counts(branch_ids=None):
+    from accounts.models import User
+    from attendance.models import Attendance
+    from workouts.models import WorkoutPlan, WorkoutTask
+
+    branches = GymBranch.objects.all()
+    if branch_ids is not None:
+        branches = branches.filter(pk__in=branch_ids)
+    counts = {pk: dict.fromkeys(BranchStats.COUNTER_FIELDS, 0) for pk in branches.values_list("pk", flat=True)}
+
+    def scoped(qs, branch_field):
+        if branch_ids is not None:
+            qs = qs.filter(**{f"{branch_field}__in": branch_ids})
+        return qs.order_by()
+
+    users = scoped(User.objects.filter(is_active=True, role__in=ROLE_COUNTERS), "gym_branch_id")
+    for row in users.values("gym_branch_id", "role").annotate(n=Count("pk")):
+        counts[row["gym_branch_id"]][ROLE_COUNTERS[row["role"]]] = row["n"]
+
+    plans = scoped(WorkoutPlan.objects.all(), "gym_branch_id")
+    for row in plans.values("gym_branch_id").annotate(n=Count("pk")):
+        counts[row["gym_branch_id"]]["plan_count"] = row["n"]
+
+    tasks = scoped(WorkoutTask.objects.all(), "gym_branch_id")
+    for row in tasks.values("gym_branch_id", "status").annotate(n=Count("pk")):
+        field = TASK_STATUS_COUNTERS.get(row["status"])
+        if field:
+            counts[row["gym_branch_id"]][field] = row["n"]
+
+    open_sessions = scoped(Attendance.objects.filter(check_out__isnull=True), "gym_branch_id")
+    for row in open_sessions.values("gym_branch_id").annotate(n=Count("pk")):
+        counts[row["gym_branch_id"]]["open_attendance_count"] = row["n"]
+
+    return counts
+
+
+def find_drift(branch_ids=None):
+    """Return ``{branch_id: {field: (stored, actual)}}`` for counters that are off."""
+    actual = compute_branch_counts(branch_ids)
+    stored = {
+        row["gym_branch_id"]: row
+        for row in BranchStats.objects.filter(pk__in=actual).values("gym_branch_id", *BranchStats.COUNTER_FIELDS)
+    }
+
+    drift = defaultdict(dict)
+    for branch_id, counts in actual.items():
+        row = stored.get(branch_id)
+        for field, value in counts.items():
+            current = row[field] if row else None
+            if current != value:
+                drift[branch_id][field] = (current, value)
+    return dict(drift)
+
+
+def rebuild_branch_stats(branch_ids=None):
+    counts = compute_branch_counts(branch_ids)
+    BranchStats.objects.bulk_create(
+        [BranchStats(gym_branch_id=pk, **values) for pk, values in counts.items()],
+        update_conflicts=True,
+        unique_fields=["gym_branch"],
+        update_fields=BranchStats.COUNTER_FIELDS,
+    )
+    return len(counts)
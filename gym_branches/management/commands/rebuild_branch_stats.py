@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from gym_branches.counters import find_drift, rebuild_branch_stats
+
+
+class Command(BaseCommand):
+    help = "Recompute BranchStats counters from scratch, or verify them with --verify."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--branch", type=int, action="append", dest="branches",
+                            help="Limit to this branch id (repeatable).")
+        parser.add_argument("--verify", action="store_true",
+                            help="Only compare stored counters with the real counts.")
+
+    def handle(self, *args, branches=None, verify=False, **kwargs):
+        drift = find_drift(branches)
+        for branch_id, fields in sorted(drift.items()):
+            for field, (stored, actual) in sorted(fields.items()):
+                self.stdout.write(f"branch {branch_id}: {field} stored={stored} actual={actual}")
+
+        if verify:
+            if drift:
+                raise CommandError(f"{len(drift)} branch(es) have drifted counters.")
+            self.stdout.write(self.style.SUCCESS("Branch stats are consistent"))
+            return
+
+        with transaction.atomic():
+            rebuilt = rebuild_branch_stats(branches)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt stats for {rebuilt} branch(es)"))
@@ -0,0 +1,72 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count
+
+ROLE_COUNTERS = {"gym_manager": "manager_count", "trainer": "trainer_count", "member": "member_count"}
+TASK_STATUS_COUNTERS = {
+    "pending": "pending_task_count",
+    "in_progress": "in_progress_task_count",
+    "completed": "completed_task_count",
+}
+
+
+def backfill_branch_stats(apps, schema_editor):
+    GymBranch = apps.get_model("gym_branches", "GymBranch")
+    BranchStats = apps.get_model("gym_branches", "BranchStats")
+    User = apps.get_model("accounts", "User")
+    WorkoutPlan = apps.get_model("workouts", "WorkoutPlan")
+    WorkoutTask = apps.get_model("workouts", "WorkoutTask")
+    Attendance = apps.get_model("attendance", "Attendance")
+
+    stats = {pk: BranchStats(gym_branch_id=pk) for pk in GymBranch.objects.values_list("pk", flat=True)}
+
+    users = User.objects.filter(is_active=True, role__in=ROLE_COUNTERS).order_by()
+    for row in users.values("gym_branch_id", "role").annotate(n=Count("pk")):
+        setattr(stats[row["gym_branch_id"]], ROLE_COUNTERS[row["role"]], row["n"])
+
+    for row in WorkoutPlan.objects.order_by().values("gym_branch_id").annotate(n=Count("pk")):
+        stats[row["gym_branch_id"]].plan_count = row["n"]
+
+    tasks = WorkoutTask.objects.order_by().values("workout_plan__gym_branch_id", "status")
+    for row in tasks.annotate(n=Count("pk")):
+        if row["status"] in TASK_STATUS_COUNTERS:
+            setattr(stats[row["workout_plan__gym_branch_id"]], TASK_STATUS_COUNTERS[row["status"]], row["n"])
+
+    open_sessions = Attendance.objects.filter(check_out__isnull=True).order_by()
+    for row in open_sessions.values("gym_branch_id").annotate(n=Count("pk")):
+        stats[row["gym_branch_id"]].open_attendance_count = row["n"]
+
+    BranchStats.objects.bulk_create(stats.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym_branches', '0002_gymbranch_capacity_gymbranch_phone_and_more'),
+        ('accounts', '0005_user_mobile_number'),
+        ('workouts', '0003_alter_workoutplan_created_by_and_more'),
+        ('attendance', '0002_alter_attendance_member'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BranchStats',
+            fields=[
+                ('gym_branch', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='gym_branches.gymbranch')),
+                ('manager_count', models.IntegerField(default=0)),
+                ('trainer_count', models.IntegerField(default=0)),
+                ('member_count', models.IntegerField(default=0)),
+                ('plan_count', models.IntegerField(default=0)),
+                ('pending_task_count', models.IntegerField(default=0)),
+                ('in_progress_task_count', models.IntegerField(default=0)),
+                ('completed_task_count', models.IntegerField(default=0)),
+                ('open_attendance_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name_plural': 'Branch Stats',
+            },
+        ),
+        migrations.RunPython(backfill_branch_stats, migrations.RunPython.noop),
+    ]
@@ -14,3 +14,32 @@ class GymBranch(models.Model):
 
     def __str__(self):
         return self.name
+
+
+class BranchStats(models.Model):
+    gym_branch = models.OneToOneField(
+        GymBranch,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    manager_count = models.IntegerField(default=0)
+    trainer_count = models.IntegerField(default=0)
+    member_count = models.IntegerField(default=0)
+    plan_count = models.IntegerField(default=0)
+    pending_task_count = models.IntegerField(default=0)
+    in_progress_task_count = models.IntegerField(default=0)
+    completed_task_count = models.IntegerField(default=0)
+    open_attendance_count = models.IntegerField(default=0)
+
+    COUNTER_FIELDS = [
+        "manager_count", "trainer_count", "member_count", "plan_count",
+        "pending_task_count", "in_progress_task_count", "completed_task_count",
+        "open_attendance_count",
+    ]
+
+    class Meta:
+        verbose_name_plural = "Branch Stats"
+
+    def __str__(self):
+        return f"Stats for branch {self.gym_branch_id}"
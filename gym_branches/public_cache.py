@@ -0,0 +1,89 @@
+import hashlib
+import json
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.cache import patch_cache_control
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+from gym_management.metrics import record_cache
+
+VERSION_KEY = "public-directory:version"
+CACHE_TIMEOUT = getattr(settings, "PUBLIC_CACHE_TIMEOUT", 3600)
+MAX_AGE = getattr(settings, "PUBLIC_CACHE_MAX_AGE", 60)
+
+
+def directory_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+    return version
+
+
+def bump_directory_version():
+    cache.set(VERSION_KEY, uuid4().hex, None)
+
+
+def compute_etag(data):
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True, separators=(",", ":"))
+    return quote_etag(hashlib.sha256(payload.encode()).hexdigest()[:32])
+
+
+def _cache_key(request, name, version):
+    return f"public-directory:{name}:{version}:{request.scheme}://{request.get_host()}"
+
+
+def _conditional_response(request, cached):
+    etag, data = cached
+    if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+    if etag in if_none_match or "*" in if_none_match:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = Response(data)
+    response["ETag"] = etag
+    patch_cache_control(response, public=True, max_age=MAX_AGE)
+    return response
+
+
+def cached_public_response(request, name, build):
+    """
+    Serve ``build()`` from a cache entry tied to the public directory version.
+
+    Any branch, trainer or manager change bumps the version, so entries never
+    go stale; a matching ``If-None-Match`` gets a 304 without touching the DB.
+    """
+    key = _cache_key(request, name, directory_version())
+    cached = cache.get(key)
+    record_cache("public_directory", cached is not None)
+    if cached is None:
+        data = build()
+        cached = (compute_etag(data), data)
+        cache.set(key, cached, CACHE_TIMEOUT)
+    return _conditional_response(request, cached)
+
+
+async def adirectory_version():
+    version = await cache.aget(VERSION_KEY)
+    if version is None:
+        version = uuid4().hex
+        if not await cache.aadd(VERSION_KEY, version, None):
+            version = await cache.aget(VERSION_KEY, version)
+    return version
+
+
+async def acached_public_response(request, name, abuild):
+    """Async ``cached_public_response``; ``abuild`` is a coroutine function."""
+    key = _cache_key(request, name, await adirectory_version())
+    cached = await cache.aget(key)
+    record_cache("public_directory", cached is not None)
+    if cached is None:
+        data = await abuild()
+        cached = (compute_etag(data), data)
+        await cache.aset(key, cached, CACHE_TIMEOUT)
+    return _conditional_response(request, cached)
@@ -6,7 +6,7 @@ from accounts.models import User
 class GymBranchSerializer(serializers.ModelSerializer):
     class Meta:
         model = GymBranch
-        fields = ["id", "name", "location", "created_at"]
+        fields = ["id", "name", "location", "capacity", "created_at"]
         read_only_fields = ["id", "created_at"]
 
 
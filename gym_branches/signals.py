@@ -0,0 +1,161 @@
+from django.db.models import Count
+from django.db.models.signals import post_delete, post_init, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from .counters import ROLE_COUNTERS, TASK_STATUS_COUNTERS, bump, move
+from .models import BranchStats, GymBranch
+from .public_cache import bump_directory_version
+from accounts.models import User
+from attendance.models import Attendance
+from workouts.models import WorkoutPlan, WorkoutTask
+
+UNKNOWN = object()
+
+PUBLIC_ROLES = {User.TRAINER, User.MANAGER}
+PUBLIC_USER_FIELDS = {
+    "email", "username", "mobile_number", "profile_picture", "role", "gym_branch", "gym_branch_id", "is_active",
+}
+
+
+def _user_counter(user, branch_id, role, is_active):
+    field = ROLE_COUNTERS.get(role)
+    return (branch_id, field) if branch_id and field and is_active else None
+
+
+def _plan_counter(plan, branch_id):
+    return (branch_id, "plan_count") if branch_id else None
+
+
+def _task_counter(task, branch_id, status):
+    field = TASK_STATUS_COUNTERS.get(status)
+    return (branch_id, field) if branch_id and field else None
+
+
+def _attendance_counter(attendance, branch_id, check_out):
+    return (branch_id, "open_attendance_count") if branch_id and check_out is None else None
+
+
+TRACKED = {
+    User: (("gym_branch", "role", "is_active"), _user_counter),
+    WorkoutPlan: (("gym_branch",), _plan_counter),
+    WorkoutTask: (("gym_branch", "status"), _task_counter),
+    Attendance: (("gym_branch", "check_out"), _attendance_counter),
+}
+
+
+ATTNAMES = {
+    model: [model._meta.get_field(name).attname for name in fields]
+    for model, (fields, _) in TRACKED.items()
+}
+# Saves of deferred instances list attnames in update_fields, explicit ones field names.
+UPDATE_NAMES = {model: set(fields).union(ATTNAMES[model]) for model, (fields, _) in TRACKED.items()}
+
+
+def _snapshot(instance):
+    values = instance.__dict__
+    attnames = ATTNAMES[type(instance)]
+    if any(attname not in values for attname in attnames):
+        return UNKNOWN
+    return tuple(values[attname] for attname in attnames)
+
+
+def _stored_snapshot(instance):
+    # A tracked field was deferred: read what the row holds (None if no row).
+    return type(instance)._base_manager.filter(pk=instance.pk).values_list(*ATTNAMES[type(instance)]).first()
+
+
+def _counter(instance, snapshot):
+    _, contribution = TRACKED[type(instance)]
+    return contribution(instance, *snapshot) if snapshot is not None else None
+
+
+@receiver(post_save, sender=GymBranch)
+def branch_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        BranchStats.objects.get_or_create(gym_branch=instance)
+
+
+@receiver([post_save, post_delete], sender=GymBranch)
+def branch_changed(sender, instance, **kwargs):
+    bump_directory_version()
+
+
+def _old_role(user):
+    # Read before track_save (connected below) replaces the snapshot.
+    snapshot = getattr(user, "_branch_stats_snapshot", None)
+    return snapshot[1] if isinstance(snapshot, tuple) else None
+
+
+@receiver([post_save, post_delete], sender=User)
+def public_user_changed(sender, instance, update_fields=None, **kwargs):
+    if instance.role not in PUBLIC_ROLES and _old_role(instance) not in PUBLIC_ROLES:
+        return
+    if update_fields and not PUBLIC_USER_FIELDS.intersection(update_fields):
+        return
+    bump_directory_version()
+
+
+def mark_counted(instance):
+    """Snapshot a bulk-created ``instance`` whose counters the caller already bumped."""
+    instance._branch_stats_snapshot = _snapshot(instance)
+
+
+def track_init(sender, instance, **kwargs):
+    instance._branch_stats_snapshot = _snapshot(instance) if instance.pk is not None else None
+
+
+def track_pre_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not UPDATE_NAMES[sender].intersection(update_fields)):
+        return
+    if getattr(instance, "_branch_stats_snapshot", None) is UNKNOWN:
+        instance._branch_stats_snapshot = _stored_snapshot(instance)
+
+
+def track_save(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw or (update_fields and not UPDATE_NAMES[sender].intersection(update_fields)):
+        return
+
+    old = None if created else getattr(instance, "_branch_stats_snapshot", None)
+    new = _snapshot(instance)
+    if new is UNKNOWN:
+        new = _stored_snapshot(instance)
+
+    if old != new:
+        move(_counter(instance, old), _counter(instance, new))
+        if sender is WorkoutPlan and old is not None:
+            _move_plan_tasks(instance, old[0], new[0])
+    # Only once the counters moved, so a save retried after a failed bump
+    # still sees the change.
+    instance._branch_stats_snapshot = new
+
+
+def _move_plan_tasks(plan, old_branch_id, new_branch_id):
+    # WorkoutPlan.save() re-points the plan's tasks with a queryset update,
+    # which sends no signals, so move their status counters here.
+    tasks = WorkoutTask.objects.filter(workout_plan=plan).order_by()
+    for row in tasks.values("status").annotate(n=Count("pk")):
+        field = TASK_STATUS_COUNTERS.get(row["status"])
+        if field:
+            bump(old_branch_id, **{field: -row["n"]})
+            bump(new_branch_id, **{field: row["n"]})
+
+
+def track_pre_delete(sender, instance, **kwargs):
+    snapshot = getattr(instance, "_branch_stats_snapshot", None)
+    if snapshot is None:
+        snapshot = _snapshot(instance)
+    if snapshot is UNKNOWN:
+        snapshot = _stored_snapshot(instance)
+    instance._branch_stats_snapshot = snapshot
+
+
+def track_delete(sender, instance, **kwargs):
+    move(_counter(instance, instance._branch_stats_snapshot), None)
+
+
+for model in TRACKED:
+    post_init.connect(track_init, sender=model, dispatch_uid=f"branch-stats-init-{model.__name__}")
+    pre_save.connect(track_pre_save, sender=model, dispatch_uid=f"branch-stats-pre-save-{model.__name__}")
+    pre_delete.connect(track_pre_delete, sender=model, dispatch_uid=f"branch-stats-pre-delete-{model.__name__}")
+    post_save.connect(track_save, sender=model, dispatch_uid=f"branch-stats-save-{model.__name__}")
+    post_delete.connect(track_delete, sender=model, dispatch_uid=f"branch-stats-delete-{model.__name__}")
@@ -1,3 +1,115 @@
+from io import StringIO
+
+from django.core.management import CommandError, call_command
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from workouts.models import WorkoutPlan, WorkoutTask
+from .counters import find_drift, get_counter
+from .models import BranchStats, GymBranch
+from .public_cache import directory_version
+
+
+class ConditionalGetTests(TestCase):
+    url = "/api/v1/branches/"
+
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_superuser("admin@test.com", "Admin@1234"))
+
+    def test_unchanged_list_is_not_modified_until_a_branch_changes(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.branch.name = "Renamed"
+        self.branch.save()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_deleted_branch_changes_the_list_etag(self):
+        GymBranch.objects.create(name="Second Branch", location="Dhaka")
+        etag = self.client.get(self.url)["ETag"]
+        GymBranch.objects.filter(name="Second Branch").delete()
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class PublicDirectoryVersionTests(TestCase):
+    def setUp(self):
+        branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=branch
+        )
+
+    def test_demoting_a_trainer_bumps_the_version(self):
+        trainer = User.objects.get(pk=self.trainer.pk)
+        version = directory_version()
+        trainer.role = User.MEMBER
+        trainer.save(update_fields=["role"])
+        self.assertNotEqual(directory_version(), version)
+
+    def test_member_changes_leave_the_version_alone(self):
+        trainer = User.objects.get(pk=self.trainer.pk)
+        trainer.role = User.MEMBER
+        trainer.save()
+        version = directory_version()
+        trainer.full_name = "Renamed"
+        trainer.save()
+        self.assertEqual(directory_version(), version)
+
+
+class BranchStatsTests(TestCase):
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.other_branch = GymBranch.objects.create(name="Other Branch", location="Dhaka")
+        self.trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch
+        )
+        self.member = User.objects.create_user(
+            "member@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=self.trainer
+        )
+        plan = WorkoutPlan.objects.create(title="Plan", created_by=self.trainer, gym_branch=self.branch)
+        self.task = WorkoutTask.objects.create(workout_plan=plan, member=self.member)
+
+    def counters(self, branch):
+        return BranchStats.objects.values(
+            "trainer_count", "member_count", "plan_count", "pending_task_count", "completed_task_count"
+        ).get(pk=branch.pk)
+
+    def test_counters_follow_creates_and_status_changes(self):
+        self.task.status = "completed"
+        self.task.save()
+        self.assertEqual(self.counters(self.branch), {
+            "trainer_count": 1, "member_count": 1, "plan_count": 1,
+            "pending_task_count": 0, "completed_task_count": 1,
+        })
+        self.assertEqual(find_drift(), {})
+
+    def test_deferred_instances_move_only_their_own_counters(self):
+        member = User.objects.only("email").get(pk=self.member.pk)
+        member.gym_branch_id = self.other_branch.pk
+        member.save()
+        WorkoutTask.objects.only("id").get(pk=self.task.pk).delete()
+
+        self.assertEqual(self.counters(self.branch)["member_count"], 0)
+        self.assertEqual(self.counters(self.other_branch)["member_count"], 1)
+        self.assertEqual(self.counters(self.branch)["pending_task_count"], 0)
+        self.assertEqual(find_drift(), {})
+
+    def test_verify_reports_drift_and_rebuild_repairs_it(self):
+        BranchStats.objects.filter(pk=self.branch.pk).update(member_count=7)
+
+        with self.assertRaises(CommandError):
+            call_command("rebuild_branch_stats", verify=True, stdout=StringIO())
+        call_command("rebuild_branch_stats", branches=[self.branch.pk], stdout=StringIO())
+
+        self.assertEqual(self.counters(self.branch)["member_count"], 1)
+        call_command("rebuild_branch_stats", verify=True, stdout=StringIO())
 
-# Create your tests here.
+    def test_missing_counter_row_is_rebuilt_instead_of_read_as_zero(self):
+        BranchStats.objects.filter(pk=self.branch.pk).delete()
+        self.assertEqual(get_counter(self.branch.pk, "trainer_count"), 1)
+        self.assertEqual(find_drift(), {})
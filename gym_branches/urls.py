@@ -1,8 +1,15 @@
+from django.conf import settings
+from django.urls import path
 from rest_framework.routers import DefaultRouter
-from .views import GymBranchViewSet
+from .views import GymBranchViewSet, AsyncPublicBranchListView
 
 router = DefaultRouter()
 router.register(r"", GymBranchViewSet, basename="branches")
 
 app_name = "gym_branches"
 urlpatterns = router.urls
+
+if settings.ASYNC_READ_VIEWS:
+    urlpatterns = [
+        path("public/", AsyncPublicBranchListView.as_view(), name="branches-public-list-async"),
+    ] + urlpatterns
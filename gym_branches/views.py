@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from rest_framework import viewsets, mixins
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.decorators import action
@@ -6,11 +8,15 @@ from rest_framework.filters import SearchFilter
 from django.db.models import Prefetch
 from accounts.permissions import role_required
 from accounts.models import User
-from .models import GymBranch
+from .models import BranchStats, GymBranch
 from .serializers import GymBranchSerializer, PublicGymBranchSerializer
+from .public_cache import acached_public_response, cached_public_response
+from gym_management.async_views import AsyncAPIView, alist
+from gym_management.conditional import ConditionalGetMixin
 
 
 class GymBranchViewSet(
+    ConditionalGetMixin,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
     mixins.RetrieveModelMixin,
@@ -34,18 +40,60 @@ class GymBranchViewSet(
     def get_permissions(self):
         if self.action == "public_list":
             return [AllowAny()]
+        if self.action == "occupancy":
+            return [IsAuthenticated()]
         if self.action in ["create", "update", "partial_update", "destroy"]:
             return [IsAuthenticated(), role_required(User.SUPER_ADMIN)()]
         return [IsAuthenticated(), role_required(User.SUPER_ADMIN, User.MANAGER)()]
 
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='public')
     def public_list(self, request):
-        queryset = GymBranch.objects.prefetch_related(
-            Prefetch(
-                'users',
-                queryset=User.objects.filter(role=User.MANAGER),
-                to_attr='managers'
+        def build():
+            queryset = GymBranch.objects.prefetch_related(
+                Prefetch(
+                    'users',
+                    queryset=User.objects.filter(role=User.MANAGER),
+                    to_attr='managers'
+                )
             )
-        )
-        serializer = PublicGymBranchSerializer(queryset, many=True)
-        return Response(serializer.data)
\ No newline at end of file
+            return PublicGymBranchSerializer(queryset, many=True).data
+
+        return cached_public_response(request, "branches", build)
+
+    @action(detail=False, methods=["get"], url_path="occupancy")
+    def occupancy(self, request):
+        """Members checked in right now, read from the branch counters in one query."""
+        stats = BranchStats.objects.order_by("gym_branch_id")
+        if request.user.role != User.SUPER_ADMIN:
+            stats = stats.filter(gym_branch_id=request.user.gym_branch_id)
+        rows = stats.values("gym_branch_id", "gym_branch__name", "gym_branch__capacity", "open_attendance_count")
+        return Response([
+            {
+                "gym_branch": row["gym_branch_id"],
+                "gym_branch_name": row["gym_branch__name"],
+                "occupancy": row["open_attendance_count"],
+                "capacity": row["gym_branch__capacity"] or None,
+                "available": (
+                    max(row["gym_branch__capacity"] - row["open_attendance_count"], 0)
+                    if row["gym_branch__capacity"] else None
+                ),
+            }
+            for row in rows
+        ])
+
+
+class AsyncPublicBranchListView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    async def get(self, request):
+        return await acached_public_response(request, "branches", self.build)
+
+    async def build(self):
+        branches = await alist(GymBranch.objects.all())
+        managers = await alist(User.objects.filter(role=User.MANAGER))
+        by_branch = defaultdict(list)
+        for manager in managers:
+            by_branch[manager.gym_branch_id].append(manager)
+        for branch in branches:
+            branch.managers = by_branch[branch.id]
+        return PublicGymBranchSerializer(branches, many=True).data
@@ -0,0 +1,52 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    ``APIView`` whose handlers are coroutines.
+
+    Authentication, permissions and throttling still run synchronously (in a
+    worker thread, as the JWT user lookup may hit the DB); only the handler
+    runs on the event loop, so it must use the async ORM.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+async def alist(queryset):
+    return [obj async for obj in queryset]
+
+
+def async_reads(async_view, sync_view):
+    """Route GET/HEAD to ``async_view`` and every other method to ``sync_view``."""
+
+    async def view(request, *args, **kwargs):
+        if request.method in ("GET", "HEAD"):
+            return await async_view(request, *args, **kwargs)
+        return await sync_to_async(sync_view)(request, *args, **kwargs)
+
+    return csrf_exempt(view)
@@ -0,0 +1,75 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified support for ``list`` and ``retrieve``.
+
+    Validators come from ``updated_at`` timestamps, never from the rendered
+    body: a list is keyed on ``COUNT(*)`` and the ``MAX`` of each of
+    ``conditional_fields`` over the filtered queryset, an object on the same
+    fields of the instance. Related fields (forward foreign keys only) cover
+    names and emails the serializer copies from other rows. A matching
+    ``If-None-Match`` returns 304 before anything is serialized.
+
+    Lists carry no Last-Modified, since a delete lowers the count without
+    touching any timestamp.
+    """
+
+    conditional_fields = ("updated_at",)
+
+    def conditional_etag(self, request, *parts):
+        key = "|".join(str(part) for part in (request.user.pk, request.get_full_path(), *parts))
+        return 'W/"%s"' % hashlib.md5(key.encode(), usedforsecurity=False).hexdigest()
+
+    def conditional_response(self, request, etag, last_modified=None):
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp()) if last_modified else None,
+        )
+        if response is not None:
+            response["ETag"] = etag
+        return response
+
+    def with_validators(self, response, etag, last_modified=None):
+        response["ETag"] = etag
+        if last_modified:
+            response["Last-Modified"] = http_date(last_modified.timestamp())
+        # Per-user data: keep it out of shared caches and revalidate each time.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        validators = queryset.aggregate(
+            count=Count("pk"),
+            **{f"max_{i}": Max(field) for i, field in enumerate(self.conditional_fields)},
+        )
+        etag = self.conditional_etag(request, *validators.values())
+        not_modified = self.conditional_response(request, etag)
+        if not_modified is not None:
+            return not_modified
+        return self.with_validators(super().list(request, *args, **kwargs), etag)
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        values = [self.related_value(instance, field) for field in self.conditional_fields]
+        etag = self.conditional_etag(request, *values)
+        last_modified = max(filter(None, values), default=None)
+        not_modified = self.conditional_response(request, etag, last_modified)
+        if not_modified is not None:
+            return not_modified
+        serializer = self.get_serializer(instance)
+        return self.with_validators(Response(serializer.data), etag, last_modified)
+
+    @staticmethod
+    def related_value(instance, field):
+        for name in field.split("__"):
+            instance = getattr(instance, name, None)
+            if instance is None:
+                return None
+        return instance
@@ -0,0 +1,80 @@
+import os
+
+
+def _env_int(name, default):
+    return int(os.getenv(name, default))
+
+
+def _env_bool(name, default):
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes", "on")
+
+
+def sqlite_pragmas():
+    return [
+        f"PRAGMA journal_mode={os.getenv('SQLITE_JOURNAL_MODE', 'WAL')}",
+        f"PRAGMA synchronous={os.getenv('SQLITE_SYNCHRONOUS', 'NORMAL')}",
+        # Negative values are KiB, so this is a 64 MiB page cache per connection.
+        f"PRAGMA cache_size={_env_int('SQLITE_CACHE_SIZE', -65536)}",
+        f"PRAGMA mmap_size={_env_int('SQLITE_MMAP_SIZE', 268435456)}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+
+
+def sqlite_config(name):
+    """
+    SQLite tuned for several gunicorn workers writing at once.
+
+    WAL lets readers run next to the single writer, and ``BEGIN IMMEDIATE``
+    takes the write lock up front so a waiting transaction honours the busy
+    timeout instead of failing with "database is locked" when it upgrades.
+    """
+    return {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+        "CONN_MAX_AGE": _env_int("DB_CONN_MAX_AGE", 600),
+        "CONN_HEALTH_CHECKS": True,
+        "OPTIONS": {
+            "init_command": "; ".join(sqlite_pragmas()),
+            "transaction_mode": "IMMEDIATE",
+            "timeout": _env_int("SQLITE_BUSY_TIMEOUT_MS", 5000) / 1000,
+        },
+    }
+
+
+def postgres_config():
+    """
+    PostgreSQL with psycopg's connection pool.
+
+    Exports stream through ``QuerySet.iterator()``, which uses server-side
+    cursors here; set ``DB_DISABLE_SERVER_SIDE_CURSORS`` behind a
+    transaction-pooling PgBouncer, which cannot keep them open.
+    """
+    config = {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("POSTGRES_DB", "gym_management"),
+        "USER": os.getenv("POSTGRES_USER", "postgres"),
+        "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
+        "HOST": os.getenv("POSTGRES_HOST", "localhost"),
+        "PORT": os.getenv("POSTGRES_PORT", "5432"),
+        "CONN_HEALTH_CHECKS": True,
+        "DISABLE_SERVER_SIDE_CURSORS": _env_bool("DB_DISABLE_SERVER_SIDE_CURSORS", False),
+        "OPTIONS": {},
+    }
+    if _env_bool("DB_POOL", True):
+        # Django's pool replaces persistent connections, so CONN_MAX_AGE must be 0.
+        config["CONN_MAX_AGE"] = 0
+        config["OPTIONS"]["pool"] = {
+            "min_size": _env_int("DB_POOL_MIN_SIZE", 2),
+            "max_size": _env_int("DB_POOL_MAX_SIZE", 10),
+            "timeout": _env_int("DB_POOL_TIMEOUT", 10),
+        }
+    else:
+        config["CONN_MAX_AGE"] = _env_int("DB_CONN_MAX_AGE", 600)
+    return config
+
+
+def database_config(base_dir):
+    engine = os.getenv("DB_ENGINE", "sqlite").lower()
+    if engine in ("postgres", "postgresql"):
+        return postgres_config()
+    return sqlite_config(base_dir / os.getenv("SQLITE_NAME", "db.sqlite3"))
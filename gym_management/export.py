@@ -0,0 +1,102 @@
+import csv
+from datetime import date, datetime, time, timedelta
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+EXPORT_CHUNK_SIZE = 2000
+
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+class _Echo:
+    def write(self, value):
+        return value
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_rows(rows, fields):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(fields)
+    for row in rows:
+        yield writer.writerow([_csv_value(row[field]) for field in fields])
+
+
+def _ndjson_rows(rows):
+    encoder = DjangoJSONEncoder()
+    for row in rows:
+        yield encoder.encode(row) + "\n"
+
+
+def _parse_day(request, param):
+    raw = request.query_params.get(param)
+    if not raw:
+        return None
+    try:
+        day = parse_date(raw)
+    except ValueError:
+        day = None
+    if day is None:
+        raise ValidationError({param: "Use the YYYY-MM-DD format."})
+    return day
+
+
+def parse_date_range(request):
+    """The inclusive ``?from=``/``?to=`` days; either may be ``None``."""
+    start, end = _parse_day(request, "from"), _parse_day(request, "to")
+    if start and end and start > end:
+        raise ValidationError({"to": "Must be on or after 'from'."})
+    return start, end
+
+
+def parse_branch(request):
+    """The ``?branch=`` id, or ``None`` when it is not given."""
+    raw = request.query_params.get("branch")
+    if not raw:
+        return None
+    if not raw.isdigit():
+        raise ValidationError({"branch": "Must be a branch id."})
+    return int(raw)
+
+
+def filter_date_range(queryset, request, field):
+    """Apply inclusive ``?from=``/``?to=`` days to a datetime ``field``."""
+    start, end = parse_date_range(request)
+    if start:
+        queryset = queryset.filter(**{f"{field}__gte": timezone.make_aware(datetime.combine(start, time.min))})
+    if end:
+        next_day = datetime.combine(end + timedelta(days=1), time.min)
+        queryset = queryset.filter(**{f"{field}__lt": timezone.make_aware(next_day)})
+    return queryset
+
+
+def stream_export(request, queryset, fields, name):
+    """
+    Stream ``queryset`` as CSV (default) or NDJSON (``?as=ndjson``).
+
+    Rows are fetched with ``.values().iterator()`` in chunks, so memory stays
+    flat however many rows match.
+    """
+    fmt = request.query_params.get("as", "csv")
+    if fmt not in CONTENT_TYPES:
+        raise ValidationError({"as": f"Choose one of: {', '.join(CONTENT_TYPES)}."})
+
+    rows = queryset.values(*fields).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    content = _csv_rows(rows, fields) if fmt == "csv" else _ndjson_rows(rows)
+    response = StreamingHttpResponse(content, content_type=CONTENT_TYPES[fmt])
+    filename = f"{name}-{timezone.localdate().isoformat()}.{fmt}"
+    response["Content-Disposition"] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,122 @@
+import hmac
+import os
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Histogram, generate_latest
+from prometheus_client import multiprocess
+
+ENABLED = getattr(settings, "METRICS_ENABLED", False)
+LABELS = ("view", "method", "status")
+METHODS = {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"}
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by resolved URL name.", LABELS,
+)
+REQUEST_QUERIES = Histogram(
+    "http_request_db_queries", "SQL queries per request.", LABELS,
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, float("inf")),
+)
+REQUEST_SQL_TIME = Histogram(
+    "http_request_db_duration_seconds", "Time spent executing SQL per request.", LABELS,
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, float("inf")),
+)
+CACHE_LOOKUPS = Counter("cache_lookups_total", "Cache lookups by cache and result.", ("cache", "result"))
+
+# [query count, SQL seconds] for the request being handled. asgiref copies the
+# context into sync_to_async threads, so async views' queries land here too.
+_request_totals = ContextVar("request_totals", default=None)
+
+
+def record_cache(name, hit):
+    if ENABLED:
+        CACHE_LOOKUPS.labels(name, "hit" if hit else "miss").inc()
+
+
+def _record_query(execute, sql, params, many, context):
+    totals = _request_totals.get()
+    if totals is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        totals[0] += 1
+        totals[1] += time.perf_counter() - started
+
+
+def _install_wrapper(sender, connection, **kwargs):
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_record_query)
+
+
+def _observe(request, response, started, totals):
+    match = request.resolver_match
+    labels = (
+        match.view_name if match else "unmatched",
+        request.method if request.method in METHODS else "other",
+        str(response.status_code),
+    )
+    REQUEST_LATENCY.labels(*labels).observe(time.perf_counter() - started)
+    REQUEST_QUERIES.labels(*labels).observe(totals[0])
+    REQUEST_SQL_TIME.labels(*labels).observe(totals[1])
+
+
+@sync_and_async_middleware
+def metrics_middleware(get_response):
+    """Record latency, SQL query count and SQL time per resolved URL name."""
+    connection_created.connect(_install_wrapper, dispatch_uid="gym_management.metrics")
+    for connection in connections.all(initialized_only=True):
+        _install_wrapper(None, connection)
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            totals = [0, 0.0]
+            token = _request_totals.set(totals)
+            started = time.perf_counter()
+            try:
+                response = await get_response(request)
+            finally:
+                _request_totals.reset(token)
+            _observe(request, response, started, totals)
+            return response
+    else:
+        def middleware(request):
+            totals = [0, 0.0]
+            token = _request_totals.set(totals)
+            started = time.perf_counter()
+            try:
+                response = get_response(request)
+            finally:
+                _request_totals.reset(token)
+            _observe(request, response, started, totals)
+            return response
+
+    return middleware
+
+
+def metrics_view(request):
+    """
+    Prometheus text exposition.
+
+    Under gunicorn, point ``PROMETHEUS_MULTIPROC_DIR`` at an empty directory so
+    every worker writes its samples there and any worker can serve the sum.
+    Without ``METRICS_TOKEN`` the endpoint refuses everyone.
+    """
+    expected = getattr(settings, "METRICS_TOKEN", "")
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not expected or not hmac.compare_digest(supplied, expected):
+        return HttpResponseForbidden()
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
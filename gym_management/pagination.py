@@ -0,0 +1,150 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import ValidationError
+from django.core.paginator import Page
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .async_views import alist
+
+
+class KeysetPagination(PageNumberPagination):
+    """
+    Page-number pagination with an opt-in keyset mode.
+
+    Clients that send ``?cursor=`` (empty for the first page) get pages keyed
+    on ``(<view.cursor_field>, id)`` instead of ``OFFSET``/``COUNT(*)``, so a
+    deep page costs the same as the first one. Other clients keep the default
+    ``count/next/previous/results`` page-number response.
+    """
+
+    cursor_query_param = "cursor"
+    default_cursor_field = "created_at"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.field = getattr(view, "cursor_field", self.default_cursor_field)
+        self.page_size = self.get_page_size(request)
+        self.model_field = queryset.model._meta.get_field(self.field)
+        value, pk, reverse = self.decode_cursor(request)
+
+        if reverse:
+            qs = queryset.order_by(self.field, "pk")
+            if value is not None:
+                qs = qs.filter(**{f"{self.field}__gte": value}).exclude(
+                    Q(**{self.field: value}) & Q(pk__lte=pk)
+                )
+        else:
+            qs = queryset.order_by(f"-{self.field}", "-pk")
+            if value is not None:
+                qs = qs.filter(**{f"{self.field}__lte": value}).exclude(
+                    Q(**{self.field: value}) & Q(pk__gte=pk)
+                )
+
+        rows = list(qs[: self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next, self.has_previous = value is not None, has_more
+        else:
+            self.has_next, self.has_previous = has_more, value is not None
+
+        self.page_rows = rows
+        return rows
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async ``paginate_queryset``; page-number mode runs COUNT and the page query together."""
+        if self.cursor_query_param in request.query_params:
+            return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+        self.keyset = False
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        raw = request.query_params.get(self.page_query_param) or 1
+        try:
+            number = int(raw)
+            if number < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_page_message.format(page_number=raw, message="Invalid page."))
+
+        offset = (number - 1) * page_size
+        paginator.count = await queryset.acount()
+        rows = await alist(queryset[offset:offset + page_size])
+        if number > paginator.num_pages:
+            raise NotFound(self.invalid_page_message.format(page_number=raw, message="That page contains no results"))
+
+        self.page = Page(rows, number, paginator)
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        return rows
+
+    def decode_cursor(self, request):
+        raw = request.query_params.get(self.cursor_query_param)
+        if not raw:
+            return None, None, False
+        try:
+            data = json.loads(urlsafe_b64decode(raw.encode("ascii")))
+            value = self.model_field.to_python(data["v"])
+            return value, int(data["id"]), bool(data.get("r"))
+        except (TypeError, ValueError, KeyError, ValidationError) as exc:
+            raise NotFound(self.invalid_cursor_message) from exc
+
+    def encode_cursor(self, row, reverse):
+        data = {"v": self.model_field.value_to_string(row), "id": row.pk}
+        if reverse:
+            data["r"] = 1
+        token = urlsafe_b64encode(json.dumps(data, separators=(",", ":")).encode()).decode("ascii")
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def get_next_link(self):
+        if not self.keyset:
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.keyset:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": "Keyset pagination cursor. Send it empty to start; "
+                               "the response then omits `count`.",
+                "schema": {"type": "string"},
+            }
+        ]
@@ -14,6 +14,8 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
+from .database import database_config
+
 BASE_DIR = Path(__file__).resolve().parent.parent
 load_dotenv(BASE_DIR / ".env")
 
@@ -63,6 +65,11 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "False").lower() == "true"
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "gym_management.metrics.metrics_middleware")
+
 CORS_ALLOWED_ORIGINS = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -93,11 +100,9 @@ WSGI_APPLICATION = 'gym_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Built from DB_ENGINE and friends, see gym_management/database.py and .env.example.
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': database_config(BASE_DIR),
 }
 
 
@@ -143,7 +148,7 @@ AUTH_USER_MODEL = "accounts.User"
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
@@ -168,6 +173,24 @@ SPECTACULAR_SETTINGS = {
 }
 
 
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+
+DASHBOARD_STATS_CACHE_TIMEOUT = int(os.getenv("DASHBOARD_STATS_CACHE_TIMEOUT", "300"))
+PUBLIC_CACHE_TIMEOUT = int(os.getenv("PUBLIC_CACHE_TIMEOUT", "3600"))
+PUBLIC_CACHE_MAX_AGE = int(os.getenv("PUBLIC_CACHE_MAX_AGE", "60"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+AUTH_USER_CACHE_TTL = int(os.getenv("AUTH_USER_CACHE_TTL", "60"))
+# Serve the read-heavy endpoints from async views; only worth it under an ASGI server.
+ASYNC_READ_VIEWS = os.getenv("ASYNC_READ_VIEWS", "False").lower() == "true"
+PROFILE_PICTURE_WORKERS = int(os.getenv("PROFILE_PICTURE_WORKERS", "2"))
+PROFILE_PICTURE_MAX_SIZE = int(os.getenv("PROFILE_PICTURE_MAX_SIZE", "1024"))
+ATTENDANCE_ARCHIVE_AFTER_DAYS = int(os.getenv("ATTENDANCE_ARCHIVE_AFTER_DAYS", "365"))
+
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
@@ -0,0 +1,19 @@
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from .metrics import metrics_view
+
+
+class MetricsAccessTests(SimpleTestCase):
+    def get(self, **headers):
+        return metrics_view(RequestFactory().get("/metrics", headers=headers)).status_code
+
+    @override_settings(METRICS_TOKEN="")
+    def test_refuses_everyone_without_a_token(self):
+        self.assertEqual(self.get(), 403)
+        self.assertEqual(self.get(authorization="Bearer "), 403)
+
+    @override_settings(METRICS_TOKEN="secret")
+    def test_requires_the_configured_token(self):
+        self.assertEqual(self.get(), 403)
+        self.assertEqual(self.get(authorization="Bearer wrong"), 403)
+        self.assertEqual(self.get(authorization="Bearer secret"), 200)
@@ -32,5 +32,10 @@ urlpatterns = [
     path("api/v1/attendance/", include("attendance.urls", namespace="attendance")),
 ]
 
+if settings.METRICS_ENABLED:
+    from .metrics import metrics_view
+
+    urlpatterns.append(path("metrics", metrics_view, name="metrics"))
+
 if settings.DEBUG:
     urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
\ No newline at end of file
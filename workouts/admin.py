@@ -15,12 +15,12 @@ class WorkoutPlanAdmin(admin.ModelAdmin):
 
 @admin.register(WorkoutTask)
 class WorkoutTaskAdmin(admin.ModelAdmin):
-    list_display = ("id", "workout_plan", "member", "status", "due_date", "created_at")
-    list_filter = ("status", "due_date", "created_at")
+    list_display = ("id", "workout_plan", "member", "gym_branch", "status", "due_date", "created_at")
+    list_filter = ("status", "gym_branch", "due_date", "created_at")
     search_fields = ("member__email", "workout_plan__title")
     ordering = ("-created_at",)
     readonly_fields = ("created_at",)
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.select_related("workout_plan", "member", "workout_plan__gym_branch")
+        return qs.select_related("workout_plan", "member", "gym_branch")
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym_branches', '0003_branchstats'),
+        ('workouts', '0003_alter_workoutplan_created_by_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='workouttask',
+            name='gym_branch',
+            field=models.ForeignKey(editable=False, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='workout_tasks', to='gym_branches.gymbranch'),
+        ),
+        migrations.AddIndex(
+            model_name='workouttask',
+            index=models.Index(fields=['gym_branch', 'created_at'], name='workouts_wo_gym_bra_dc4734_idx'),
+        ),
+    ]
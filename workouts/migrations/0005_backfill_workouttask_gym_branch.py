@@ -0,0 +1,31 @@
+from django.db import migrations
+from django.db.models import Max, Min, OuterRef, Subquery
+
+BATCH_SIZE = 5000
+
+
+def backfill_gym_branch(apps, schema_editor):
+    WorkoutPlan = apps.get_model("workouts", "WorkoutPlan")
+    WorkoutTask = apps.get_model("workouts", "WorkoutTask")
+
+    plan_branch = WorkoutPlan.objects.filter(pk=OuterRef("workout_plan_id")).values("gym_branch_id")[:1]
+    pending = WorkoutTask.objects.filter(gym_branch__isnull=True)
+    bounds = pending.aggregate(first=Min("pk"), last=Max("pk"))
+    start, last_pk = bounds["first"], bounds["last"]
+    # Each batch commits on its own, so an interrupted run resumes where the
+    # NULL rows begin.
+    while last_pk is not None and start <= last_pk:
+        pending.filter(pk__gte=start, pk__lt=start + BATCH_SIZE).update(gym_branch_id=Subquery(plan_branch))
+        start += BATCH_SIZE
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ('workouts', '0004_workouttask_gym_branch'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_gym_branch, migrations.RunPython.noop),
+    ]
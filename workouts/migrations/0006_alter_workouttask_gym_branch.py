@@ -0,0 +1,20 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gym_branches', '0003_branchstats'),
+        ('workouts', '0005_backfill_workouttask_gym_branch'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='workouttask',
+            name='gym_branch',
+            field=models.ForeignKey(editable=False, on_delete=django.db.models.deletion.PROTECT, related_name='workout_tasks', to='gym_branches.gymbranch'),
+        ),
+    ]
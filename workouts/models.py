@@ -1,6 +1,6 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
 
 class WorkoutPlan(models.Model):
     title = models.CharField(max_length=200)
@@ -34,6 +34,21 @@ class WorkoutPlan(models.Model):
             if self.gym_branch_id and self.created_by.gym_branch_id != self.gym_branch_id:
                 raise ValidationError({"gym_branch": "Plan must belong to trainer's branch."})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The branch as loaded, so save() only re-points tasks after a move.
+        instance._loaded_branch_id = instance.__dict__.get("gym_branch_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        moved = not self._state.adding and self.gym_branch_id != getattr(self, "_loaded_branch_id", None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if moved:
+                self.tasks.exclude(gym_branch_id=self.gym_branch_id).update(gym_branch_id=self.gym_branch_id)
+        self._loaded_branch_id = self.gym_branch_id
+
     def __str__(self):
         branch_name = self.gym_branch.name if self.gym_branch_id else "No Branch"
         return f"{self.title} - {branch_name}"
@@ -55,6 +70,13 @@ class WorkoutTask(models.Model):
     on_delete=models.CASCADE, 
     related_name="workout_tasks",
 )
+    # Copied from the plan so branch scoping does not need a join.
+    gym_branch = models.ForeignKey(
+        "gym_branches.GymBranch",
+        on_delete=models.PROTECT,
+        related_name="workout_tasks",
+        editable=False,
+    )
     status = models.CharField(
         max_length=20,
         choices=STATUS_CHOICES,
@@ -70,6 +92,7 @@ class WorkoutTask(models.Model):
         indexes = [
             models.Index(fields=["member", "status"]),
             models.Index(fields=["workout_plan", "created_at"]),
+            models.Index(fields=["gym_branch", "created_at"]),
         ]
 
     def clean(self):
@@ -84,6 +107,22 @@ class WorkoutTask(models.Model):
                 if self.member.gym_branch_id != plan_branch_id:
                     raise ValidationError({"member": "Cannot assign tasks across branches."})
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_plan_id = instance.__dict__.get("workout_plan_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        # The plan keeps its tasks' branch in sync, so only a new or changed
+        # plan needs to be read here.
+        if self.workout_plan_id and (
+            self.gym_branch_id is None or self.workout_plan_id != getattr(self, "_loaded_plan_id", None)
+        ):
+            self.gym_branch_id = self.workout_plan.gym_branch_id
+        super().save(*args, **kwargs)
+        self._loaded_plan_id = self.workout_plan_id
+
     def __str__(self):
         plan_title = self.workout_plan.title if self.workout_plan_id else "No Plan"
         member_email = self.member.email if self.member_id else "No Member"
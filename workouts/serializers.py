@@ -1,7 +1,16 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.utils import timezone
 from rest_framework import serializers
 from accounts.models import User
+from accounts.stats import invalidate_user_stats
+from gym_branches.counters import TASK_STATUS_COUNTERS, bump
 from .models import WorkoutPlan, WorkoutTask
 
+MAX_BULK_ASSIGN = 500
+MAX_BATCH_STATUS = 200
+
 class WorkoutPlanSerializer(serializers.ModelSerializer):
     created_by_email = serializers.EmailField(source="created_by.email", read_only=True)
     gym_branch_name = serializers.CharField(source="gym_branch.name", read_only=True)
@@ -31,6 +40,18 @@ class WorkoutPlanSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+class WorkoutPlanStatsSerializer(WorkoutPlanSerializer):
+    assigned_count = serializers.IntegerField(read_only=True)
+    completed_count = serializers.IntegerField(read_only=True)
+    overdue_count = serializers.IntegerField(read_only=True)
+    completion_rate = serializers.FloatField(read_only=True)
+
+    class Meta(WorkoutPlanSerializer.Meta):
+        fields = WorkoutPlanSerializer.Meta.fields + [
+            "assigned_count", "completed_count", "overdue_count", "completion_rate",
+        ]
+
+
 class WorkoutTaskSerializer(serializers.ModelSerializer):
     workout_plan_title = serializers.CharField(source="workout_plan.title", read_only=True)
     member_email = serializers.EmailField(source="member.email", read_only=True)
@@ -38,8 +59,8 @@ class WorkoutTaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = WorkoutTask
         fields = ["id", "workout_plan", "workout_plan_title", "member",
-                  "member_email", "status", "due_date", "created_at"]
-        read_only_fields = ["id", "workout_plan_title", "member_email", "created_at"]
+                  "member_email", "status", "due_date", "created_at", "updated_at"]
+        read_only_fields = ["id", "workout_plan_title", "member_email", "created_at", "updated_at"]
 
     def validate(self, attrs):
         user = self.context["request"].user
@@ -66,4 +87,125 @@ class WorkoutTaskSerializer(serializers.ModelSerializer):
             if member and member.gym_branch_id != user_branch:
                 raise serializers.ValidationError({"member": "Member must be from your branch."})
 
-        return attrs
\ No newline at end of file
+        return attrs
+
+class WorkoutTaskBulkAssignSerializer(serializers.Serializer):
+    workout_plan = serializers.PrimaryKeyRelatedField(queryset=WorkoutPlan.objects.all())
+    members = serializers.ListField(
+        child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_ASSIGN
+    )
+    due_date = serializers.DateField(required=False, allow_null=True)
+
+    def validate(self, attrs):
+        user = self.context["request"].user
+        plan = attrs["workout_plan"]
+
+        if user.role == User.TRAINER and plan.gym_branch_id != user.gym_branch_id:
+            raise serializers.ValidationError({"workout_plan": "Plan must be from your branch."})
+
+        member_ids = list(dict.fromkeys(attrs["members"]))
+        members = User.objects.in_bulk(member_ids)
+        missing = [pk for pk in member_ids if pk not in members]
+        not_members = [pk for pk, m in members.items() if m.role != User.MEMBER]
+        other_branch = [pk for pk, m in members.items() if m.gym_branch_id != plan.gym_branch_id]
+
+        errors = []
+        if missing:
+            errors.append(f"Unknown users: {missing}.")
+        if not_members:
+            errors.append(f"Can only assign to members: {not_members}.")
+        if other_branch:
+            errors.append(f"Cannot assign tasks across branches: {other_branch}.")
+        if errors:
+            raise serializers.ValidationError({"members": errors})
+
+        attrs["members"] = [members[pk] for pk in member_ids]
+        return attrs
+
+    def create(self, validated_data):
+        plan = validated_data["workout_plan"]
+        members = validated_data["members"]
+
+        with transaction.atomic():
+            tasks = WorkoutTask.objects.bulk_create([
+                WorkoutTask(
+                    workout_plan=plan,
+                    gym_branch_id=plan.gym_branch_id,
+                    member=member,
+                    due_date=validated_data.get("due_date"),
+                )
+                for member in members
+            ])
+            # bulk_create skips the signal handlers behind BranchStats and the
+            # dashboard cache, so apply their effects here.
+            bump(plan.gym_branch_id, pending_task_count=len(tasks))
+            invalidate_user_stats(User.MEMBER, *(member.id for member in members))
+            invalidate_user_stats(User.TRAINER, plan.created_by_id)
+        return tasks
+
+
+class WorkoutTaskStatusItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    status = serializers.ChoiceField(choices=WorkoutTask.STATUS_CHOICES)
+    updated_at = serializers.DateTimeField()
+
+
+class WorkoutTaskBatchStatusSerializer(serializers.Serializer):
+    """
+    Status changes for many tasks, each guarded by the ``updated_at`` the
+    client last saw.
+
+    ``context["queryset"]`` is the caller's scoped task queryset; tasks outside
+    it are reported as not found rather than revealed.
+    """
+
+    tasks = serializers.ListField(
+        child=WorkoutTaskStatusItemSerializer(), allow_empty=False, max_length=MAX_BATCH_STATUS
+    )
+
+    def validate_tasks(self, items):
+        ids = [item["id"] for item in items]
+        duplicates = sorted({pk for pk in ids if ids.count(pk) > 1})
+        if duplicates:
+            raise serializers.ValidationError(f"Duplicate tasks: {duplicates}.")
+        return items
+
+    def save(self):
+        items = self.validated_data["tasks"]
+        now = timezone.now()
+        results, changed = [], []
+        deltas = defaultdict(Counter)
+
+        with transaction.atomic():
+            tasks = (
+                self.context["queryset"].select_related("workout_plan").select_for_update(of=("self",))
+                .in_bulk([item["id"] for item in items])
+            )
+            for index, item in enumerate(items):
+                task = tasks.get(item["id"])
+                result = {"index": index, "id": item["id"]}
+                if task is None:
+                    result.update(status="rejected", error="Task not found.")
+                elif task.updated_at != item["updated_at"]:
+                    result.update(
+                        status="conflict", error="Task was changed by someone else.",
+                        current_status=task.status, updated_at=task.updated_at,
+                    )
+                elif task.status == item["status"]:
+                    result.update(status="unchanged", updated_at=task.updated_at)
+                else:
+                    deltas[task.gym_branch_id][TASK_STATUS_COUNTERS[task.status]] -= 1
+                    deltas[task.gym_branch_id][TASK_STATUS_COUNTERS[item["status"]]] += 1
+                    task.status, task.updated_at = item["status"], now
+                    changed.append(task)
+                    result.update(status="updated", updated_at=now)
+                results.append(result)
+
+            # bulk_update skips the signal handlers behind BranchStats and the
+            # dashboard cache, so apply their effects here.
+            WorkoutTask.objects.bulk_update(changed, ["status", "updated_at"])
+            for branch_id, branch_deltas in deltas.items():
+                bump(branch_id, **branch_deltas)
+            invalidate_user_stats(User.MEMBER, *{task.member_id for task in changed})
+            invalidate_user_stats(User.TRAINER, *{task.workout_plan.created_by_id for task in changed})
+        return results
@@ -1,3 +1,195 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from accounts.stats import get_dashboard_stats
+from gym_branches.counters import find_drift
+from gym_branches.models import BranchStats, GymBranch
+from .models import WorkoutPlan, WorkoutTask
+from .serializers import WorkoutTaskSerializer
+
+
+class BatchStatusTests(TestCase):
+    url = "/api/v1/workouts/workout-tasks/batch-status/"
+
+    def setUp(self):
+        branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        trainer = User.objects.create_user("trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=branch)
+        self.member = User.objects.create_user(
+            "member@test.com", "Member@1234", role=User.MEMBER, gym_branch=branch, trainer=trainer
+        )
+        other = User.objects.create_user(
+            "other@test.com", "Member@1234", role=User.MEMBER, gym_branch=branch, trainer=trainer
+        )
+        plan = WorkoutPlan.objects.create(title="Plan", created_by=trainer, gym_branch=branch)
+        self.tasks = [WorkoutTask.objects.create(workout_plan=plan, member=self.member) for _ in range(3)]
+        self.foreign = WorkoutTask.objects.create(workout_plan=plan, member=other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.member)
+
+    def item(self, task, status="completed"):
+        return {"id": task.id, "status": status, "updated_at": WorkoutTaskSerializer(task).data["updated_at"]}
+
+    def test_applies_fresh_items_and_reports_the_rest(self):
+        stale = self.item(self.tasks[2])
+        WorkoutTask.objects.get(pk=self.tasks[2].pk).save()
+
+        response = self.client.post(self.url, {"tasks": [
+            self.item(self.tasks[0]),
+            self.item(self.tasks[1], "pending"),
+            stale,
+            self.item(self.foreign),
+        ]}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [result["status"] for result in response.data["results"]],
+            ["updated", "unchanged", "conflict", "rejected"],
+        )
+        self.assertEqual(
+            list(WorkoutTask.objects.order_by("pk").values_list("status", flat=True)),
+            ["completed", "pending", "pending", "pending"],
+        )
+        self.assertEqual(find_drift(), {})
+
+
+class TaskBranchTests(TestCase):
+    def setUp(self):
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.other_branch = GymBranch.objects.create(name="Other Branch", location="Dhaka")
+        trainer = User.objects.create_user("trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch)
+        member = User.objects.create_user(
+            "member@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=trainer
+        )
+        self.plan = WorkoutPlan.objects.create(title="Plan", created_by=trainer, gym_branch=self.branch)
+        self.task = WorkoutTask.objects.create(workout_plan=self.plan, member=member)
+
+    def queries(self, fn):
+        with CaptureQueriesContext(connection) as captured:
+            fn()
+        return " ".join(query["sql"] for query in captured)
+
+    def test_saving_a_loaded_task_does_not_read_its_plan_branch(self):
+        task = WorkoutTask.objects.get(pk=self.task.pk)
+        task.status = "completed"
+        self.assertNotIn('"workouts_workoutplan"."gym_branch_id"', self.queries(task.save))
+        self.assertEqual(WorkoutTask.objects.get(pk=self.task.pk).gym_branch_id, self.branch.pk)
+
+    def test_plan_save_re_points_tasks_only_after_a_move(self):
+        plan = WorkoutPlan.objects.get(pk=self.plan.pk)
+        plan.title = "Renamed"
+        self.assertNotIn('UPDATE "workouts_workouttask"', self.queries(plan.save))
+
+        plan.gym_branch = self.other_branch
+        plan.save()
+        self.assertEqual(WorkoutTask.objects.get(pk=self.task.pk).gym_branch_id, self.other_branch.pk)
+        self.assertEqual(find_drift(), {})
+
+
+class BulkAssignTests(TestCase):
+    url = "/api/v1/workouts/workout-tasks/bulk-assign/"
+
+    def setUp(self):
+        cache.clear()
+        self.branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        other_branch = GymBranch.objects.create(name="Other Branch", location="Dhaka")
+        self.trainer = User.objects.create_user(
+            "trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=self.branch
+        )
+        self.members = [
+            User.objects.create_user(
+                f"member{i}@test.com", "Member@1234", role=User.MEMBER, gym_branch=self.branch, trainer=self.trainer
+            )
+            for i in range(2)
+        ]
+        other_trainer = User.objects.create_user(
+            "trainer2@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=other_branch
+        )
+        self.outsider = User.objects.create_user(
+            "outsider@test.com", "Member@1234", role=User.MEMBER, gym_branch=other_branch, trainer=other_trainer
+        )
+        self.plan = WorkoutPlan.objects.create(title="Plan", created_by=self.trainer, gym_branch=self.branch)
+        self.client = APIClient()
+        self.client.force_authenticate(self.trainer)
+
+    def test_assigns_each_member_once_and_keeps_counters_and_dashboards_fresh(self):
+        self.assertEqual(get_dashboard_stats(self.members[0])["total_tasks"], 0)
+        self.assertEqual(get_dashboard_stats(self.trainer)["total_tasks"], 0)
+
+        response = self.client.post(self.url, {
+            "workout_plan": self.plan.pk,
+            "members": [self.members[0].pk, self.members[1].pk, self.members[0].pk],
+        }, format="json")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 2)
+        self.assertEqual(BranchStats.objects.get(pk=self.branch.pk).pending_task_count, 2)
+        self.assertEqual(find_drift(), {})
+        self.assertEqual(get_dashboard_stats(self.members[0])["total_tasks"], 1)
+        self.assertEqual(get_dashboard_stats(self.trainer)["total_tasks"], 2)
+
+    def test_any_invalid_member_rejects_the_whole_batch(self):
+        response = self.client.post(self.url, {
+            "workout_plan": self.plan.pk,
+            "members": [self.members[0].pk, self.outsider.pk],
+        }, format="json")
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WorkoutTask.objects.exists())
+
+
+class PlanStatsTests(TestCase):
+    url = "/api/v1/workouts/workout-plans/"
+
+    def setUp(self):
+        branch = GymBranch.objects.create(name="Test Branch", location="Dhaka")
+        self.trainer = User.objects.create_user("trainer@test.com", "Trainer@1234", role=User.TRAINER, gym_branch=branch)
+        self.members = [
+            User.objects.create_user(
+                f"member{i}@test.com", "Member@1234", role=User.MEMBER, gym_branch=branch, trainer=self.trainer
+            )
+            for i in range(3)
+        ]
+        self.plan = WorkoutPlan.objects.create(title="Plan", created_by=self.trainer, gym_branch=branch)
+        yesterday = timezone.localdate() - timedelta(days=1)
+        for member, status, due_date in (
+            (self.members[0], "completed", yesterday),
+            (self.members[0], "pending", None),
+            (self.members[1], "completed", None),
+            (self.members[2], "pending", yesterday),
+        ):
+            WorkoutTask.objects.create(workout_plan=self.plan, member=member, status=status, due_date=due_date)
+        self.empty_plan = WorkoutPlan.objects.create(title="Empty", created_by=self.trainer, gym_branch=branch)
+        self.client = APIClient()
+        self.client.force_authenticate(self.trainer)
+
+    def fetch(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return {row["id"]: row for row in response.data["results"]}
+
+    def test_counts_members_and_overdue_tasks_per_plan(self):
+        rows = self.fetch(with_stats=1)
+
+        stats = {field: rows[self.plan.pk][field] for field in ("assigned_count", "completed_count", "overdue_count")}
+        self.assertEqual(stats, {"assigned_count": 3, "completed_count": 2, "overdue_count": 1})
+        self.assertEqual(rows[self.plan.pk]["completion_rate"], 0.667)
+        self.assertEqual(rows[self.empty_plan.pk]["assigned_count"], 0)
+        self.assertEqual(rows[self.empty_plan.pk]["completion_rate"], 0.0)
+        self.assertNotIn("assigned_count", self.fetch()[self.plan.pk])
 
-# Create your tests here.
+    def test_query_count_does_not_grow_with_the_page(self):
+        with CaptureQueriesContext(connection) as small:
+            self.fetch(with_stats=1)
+        for i in range(5):
+            plan = WorkoutPlan.objects.create(title=f"Plan {i}", created_by=self.trainer, gym_branch=self.plan.gym_branch)
+            WorkoutTask.objects.create(workout_plan=plan, member=self.members[0])
+        with CaptureQueriesContext(connection) as large:
+            self.assertEqual(len(self.fetch(with_stats=1)), 7)
+        self.assertEqual(len(small), len(large))
@@ -1,10 +1,43 @@
-from rest_framework import viewsets, mixins
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import viewsets, mixins, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.exceptions import PermissionDenied
 from accounts.models import User
 from accounts.permissions import role_required
+from gym_management.conditional import ConditionalGetMixin
+from gym_management.export import filter_date_range, stream_export
+from gym_management.pagination import KeysetPagination
 from .models import WorkoutPlan, WorkoutTask
-from .serializers import WorkoutPlanSerializer, WorkoutTaskSerializer
+from .serializers import (
+    WorkoutPlanSerializer, WorkoutPlanStatsSerializer, WorkoutTaskSerializer, WorkoutTaskBulkAssignSerializer,
+    WorkoutTaskBatchStatusSerializer,
+)
+
+TASK_EXPORT_FIELDS = [
+    "id", "workout_plan_id", "workout_plan__title", "member_id", "member__email",
+    "gym_branch_id", "status", "due_date", "created_at", "updated_at",
+]
+
+PLAN_STAT_FIELDS = ("assigned_count", "completed_count", "overdue_count")
+
+
+def plan_stats(plan_ids):
+    """``{plan_id: {assigned_count, completed_count, overdue_count}}`` in one grouped query."""
+    completed = Q(status="completed")
+    rows = (
+        WorkoutTask.objects.filter(workout_plan_id__in=plan_ids)
+        .order_by()
+        .values("workout_plan_id")
+        .annotate(
+            assigned_count=Count("member_id", distinct=True),
+            completed_count=Count("member_id", filter=completed, distinct=True),
+            overdue_count=Count("pk", filter=~completed & Q(due_date__lt=timezone.localdate())),
+        )
+    )
+    return {row.pop("workout_plan_id"): row for row in rows}
 
 
 class BaseScopedViewSet(viewsets.GenericViewSet):
@@ -24,6 +57,7 @@ class BaseScopedViewSet(viewsets.GenericViewSet):
 
 
 class WorkoutPlanViewSet(
+    ConditionalGetMixin,
     BaseScopedViewSet,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
@@ -33,6 +67,7 @@ class WorkoutPlanViewSet(
 ):
     serializer_class = WorkoutPlanSerializer
     scope_field = "gym_branch_id"
+    conditional_fields = ("updated_at", "created_by__updated_at", "gym_branch__updated_at")
 
     def get_permissions(self):
         if self.action in ("create", "update", "partial_update", "destroy"):
@@ -52,8 +87,28 @@ class WorkoutPlanViewSet(
 
         return qs.none()
 
+    def with_stats(self):
+        return self.action == "list" and self.request.query_params.get("with_stats") in ("1", "true")
+
+    def get_serializer_class(self):
+        return WorkoutPlanStatsSerializer if self.with_stats() else WorkoutPlanSerializer
+
+    def list(self, request, *args, **kwargs):
+        if not self.with_stats():
+            return super().list(request, *args, **kwargs)
+        plans = self.paginate_queryset(self.filter_queryset(self.get_queryset()))
+        # Stats for just this page, grouped over the (workout_plan, created_at) index.
+        stats = plan_stats([plan.pk for plan in plans])
+        for plan in plans:
+            values = stats.get(plan.pk, dict.fromkeys(PLAN_STAT_FIELDS, 0))
+            for field in PLAN_STAT_FIELDS:
+                setattr(plan, field, values[field])
+            plan.completion_rate = round(plan.completed_count / plan.assigned_count, 3) if plan.assigned_count else 0.0
+        return self.get_paginated_response(self.get_serializer(plans, many=True).data)
+
 
 class WorkoutTaskViewSet(
+    ConditionalGetMixin,
     BaseScopedViewSet,
     mixins.ListModelMixin,
     mixins.CreateModelMixin,
@@ -62,13 +117,15 @@ class WorkoutTaskViewSet(
     mixins.DestroyModelMixin,
 ):
     serializer_class = WorkoutTaskSerializer
-    scope_field = "workout_plan__gym_branch_id"
+    pagination_class = KeysetPagination
+    scope_field = "gym_branch_id"
     allow_member = True
+    conditional_fields = ("updated_at", "workout_plan__updated_at", "member__updated_at")
 
     def get_permissions(self):
-        if self.action == "create":
+        if self.action in ("create", "bulk_assign"):
             return [IsAuthenticated(), role_required(User.TRAINER, User.SUPER_ADMIN)()]
-        if self.action in ("update", "partial_update"):
+        if self.action in ("update", "partial_update", "batch_status"):
             return [IsAuthenticated(), role_required(User.MEMBER, User.TRAINER, User.SUPER_ADMIN)()]
         if self.action == "destroy":
             return [IsAuthenticated(), role_required(User.TRAINER, User.SUPER_ADMIN)()]
@@ -76,14 +133,14 @@ class WorkoutTaskViewSet(
 
     def get_queryset(self):
         qs = WorkoutTask.objects.select_related(
-            "workout_plan", "workout_plan__gym_branch", "member"
+            "workout_plan", "member"
         )
         u = self.request.user
 
         if u.role == User.SUPER_ADMIN:
             return qs
         if u.role == User.MANAGER:
-            return qs.filter(workout_plan__gym_branch_id=u.gym_branch_id)
+            return qs.filter(gym_branch_id=u.gym_branch_id)
         if u.role == User.TRAINER:
             return qs.filter(workout_plan__created_by=u) 
         if u.role == User.MEMBER:
@@ -94,4 +151,25 @@ class WorkoutTaskViewSet(
     def perform_update(self, serializer):
         if self.request.user.role == User.MANAGER:
             raise PermissionDenied("Managers cannot update workout tasks.")
-        serializer.save()
\ No newline at end of file
+        serializer.save()
+
+    @action(detail=False, methods=["post"], url_path="bulk-assign")
+    def bulk_assign(self, request):
+        serializer = WorkoutTaskBulkAssignSerializer(data=request.data, context={"request": request})
+        serializer.is_valid(raise_exception=True)
+        tasks = serializer.save()
+        return Response(WorkoutTaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["post"], url_path="batch-status")
+    def batch_status(self, request):
+        serializer = WorkoutTaskBatchStatusSerializer(data=request.data, context={"queryset": self.get_queryset()})
+        serializer.is_valid(raise_exception=True)
+        return Response({"results": serializer.save()}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], url_path="export")
+    def export(self, request):
+        qs = filter_date_range(self.get_queryset(), request, "created_at")
+        status_filter = request.query_params.get("status")
+        if status_filter:
+            qs = qs.filter(status=status_filter)
+        return stream_export(request, qs, TASK_EXPORT_FIELDS, "workout-tasks")